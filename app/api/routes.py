@@ -1,88 +1,89 @@
 """Main API routes."""
 
+import asyncio
+import os
+import shutil
+import tempfile
 import uuid
+import zipfile
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File as FastAPIFile
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_db
+from app.core.config import get_settings
+from app.core.ingestion import CodeIngestion
+from app.models import crud
 from app.models.schemas import (
     ExportRequest,
     ReportFormat,
+    ScanListResponse,
     ScanRequest,
     ScanResponse,
     ScanResult,
     ScanStatus,
+    dump_scan_result_json,
 )
-from app.scanner.scanner import CodeScanner
+from app.tasks import run_scan_task
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
-router = APIRouter()
-scanner = CodeScanner()
+settings = get_settings()
+router = APIRouter(default_response_class=ORJSONResponse)
+ingestion = CodeIngestion()
+
+# Uploads are read in 1 MB chunks and spill from memory to disk past 64 MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_SPOOL_SIZE = 64 * 1024 * 1024
+# Errors from extracting an archive that mean the upload itself is bad: corrupt or
+# oversized zips, unsupported compression, encrypted members, unwritable member paths
+UPLOAD_ERRORS = (ValueError, zipfile.BadZipFile, NotImplementedError, RuntimeError, OSError)
 
 
 @router.post("/scan", response_model=ScanResponse)
 async def create_scan(
     request: ScanRequest,
     db: AsyncSession = Depends(get_db),
-) -> ScanResponse:
+) -> ORJSONResponse:
     """
-    Create a new scan job.
+    Create a new scan job and queue it for a worker.
 
     Args:
         request: Scan request parameters
         db: Database session
 
     Returns:
-        Scan response with scan ID
+        Pending scan response with scan ID
     """
     scan_id = str(uuid.uuid4())
     logger.info("Creating scan", scan_id=scan_id, request=request.model_dump())
 
-    # Start scan asynchronously (in production, use background tasks)
-    # For now, we'll run it synchronously
     try:
-        result = await scanner.scan(
-            repository_url=str(request.repository_url) if request.repository_url else None,
-            repository_path=request.repository_path,
-            branch=request.branch,
-            file_paths=request.file_paths,
-            include_patterns=request.include_patterns,
-            exclude_patterns=request.exclude_patterns,
-        )
-
-        return ScanResponse(
-            scan_id=result.scan_id,
-            status=result.status,
-            repository_url=result.repository_url,
-            repository_path=result.repository_path,
-            started_at=result.started_at,
-            completed_at=result.completed_at,
-            total_files=result.total_files,
-            scanned_files=result.scanned_files,
-            total_issues=len(result.issues),
-            issues_by_severity={
-                "critical": sum(1 for i in result.issues if i.severity.value == "critical"),
-                "high": sum(1 for i in result.issues if i.severity.value == "high"),
-                "medium": sum(1 for i in result.issues if i.severity.value == "medium"),
-                "low": sum(1 for i in result.issues if i.severity.value == "low"),
-                "info": sum(1 for i in result.issues if i.severity.value == "info"),
-            },
-            error=result.summary.get("error") if isinstance(result.summary, dict) else None,
-        )
+        scan = await crud.create_scan(db, scan_id, request)
+        # The scan runs on a Celery worker; clients poll GET /scan/{scan_id} for the result
+        run_scan_task.delay(scan_id, request.model_dump(mode="json"))
     except Exception as e:
-        logger.error("Scan failed", scan_id=scan_id, error=str(e))
-        raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
+        logger.error("Failed to queue scan", scan_id=scan_id, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to queue scan: {str(e)}")
+
+    response = ScanResponse(
+        scan_id=scan_id,
+        status=ScanStatus.PENDING,
+        repository_url=scan.repository_url,
+        repository_path=scan.repository_path,
+        started_at=scan.started_at,
+    )
+    return ORJSONResponse(response.model_dump(mode="json"))
 
 
 @router.post("/scan/upload", response_model=ScanResponse)
 async def scan_upload(
     file: UploadFile = FastAPIFile(...),
     db: AsyncSession = Depends(get_db),
-) -> ScanResponse:
+) -> ORJSONResponse:
     """
     Scan uploaded zip file.
 
@@ -91,17 +92,56 @@ async def scan_upload(
         db: Database session
 
     Returns:
-        Scan response
+        Pending scan response with scan ID
     """
-    # TODO: Implement zip file extraction and scanning
-    raise HTTPException(status_code=501, detail="Upload scanning not yet implemented")
+    scan_id = str(uuid.uuid4())
+    max_upload = settings.max_upload_size_mb * 1024 * 1024
+    logger.info("Receiving upload", scan_id=scan_id, filename=file.filename)
+
+    # Stream the upload to a spooled file so large archives never sit fully in memory
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE) as spool:
+        received = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            received += len(chunk)
+            if received > max_upload:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Upload exceeds {settings.max_upload_size_mb} MB",
+                )
+            spool.write(chunk)
+        spool.seek(0)
+
+        target_dir = os.path.join(settings.upload_dir, scan_id)
+        try:
+            await asyncio.to_thread(ingestion.extract_archive, spool, target_dir)
+        except UPLOAD_ERRORS as e:
+            shutil.rmtree(target_dir, ignore_errors=True)
+            logger.warning("Rejected upload", scan_id=scan_id, error=str(e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    request = ScanRequest(repository_path=target_dir)
+    try:
+        scan = await crud.create_scan(db, scan_id, request)
+        run_scan_task.delay(scan_id, request.model_dump(mode="json"), cleanup=True)
+    except Exception as e:
+        shutil.rmtree(target_dir, ignore_errors=True)
+        logger.error("Failed to queue scan", scan_id=scan_id, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to queue scan: {str(e)}")
+
+    response = ScanResponse(
+        scan_id=scan_id,
+        status=ScanStatus.PENDING,
+        repository_path=scan.repository_path,
+        started_at=scan.started_at,
+    )
+    return ORJSONResponse(response.model_dump(mode="json"))
 
 
 @router.get("/scan/{scan_id}", response_model=ScanResult)
 async def get_scan_result(
     scan_id: str,
     db: AsyncSession = Depends(get_db),
-) -> ScanResult:
+) -> Response:
     """
     Get scan result by ID.
 
@@ -112,29 +152,40 @@ async def get_scan_result(
     Returns:
         Complete scan result
     """
-    # TODO: Retrieve from database
-    raise HTTPException(status_code=501, detail="Database retrieval not yet implemented")
+    result = await crud.get_scan_result(db, scan_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    # Serialize directly; results can hold thousands of issues and are already valid
+    return Response(content=dump_scan_result_json(result), media_type="application/json")
 
 
-@router.get("/scans", response_model=List[ScanResponse])
+@router.get("/scans", response_model=ScanListResponse)
 async def list_scans(
-    limit: int = 20,
-    offset: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-) -> List[ScanResponse]:
+) -> ORJSONResponse:
     """
-    List all scans.
+    List scans, newest first.
 
     Args:
         limit: Maximum number of results
-        offset: Pagination offset
+        cursor: Cursor from the previous page's next_cursor
         db: Database session
 
     Returns:
-        List of scan responses
+        Page of scan responses with the cursor for the next page
     """
-    # TODO: Retrieve from database
-    return []
+    try:
+        records, next_cursor = await crud.list_scans(db, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    page = ScanListResponse(
+        scans=[crud.scan_response_from_record(record) for record in records],
+        next_cursor=next_cursor,
+    )
+    return ORJSONResponse(page.model_dump(mode="json"))
 
 
 @router.post("/scan/{scan_id}/export")
@@ -1,7 +1,6 @@
 """CLI tool for CodeGuard AI."""
 
 import asyncio
-import json
 import sys
 from pathlib import Path
 from typing import Optional
@@ -10,7 +9,7 @@ import click
 from rich.console import Console
 from rich.table import Table
 
-from app.models.schemas import ReportFormat
+from app.models.schemas import ReportFormat, dump_scan_result_json
 from app.scanner.scanner import CodeScanner
 from app.core.logging import setup_logging, get_logger
 
@@ -25,6 +24,7 @@ logger = get_logger(__name__)
 @click.option("--branch", "-b", type=str, help="Git branch to scan")
 @click.option("--include", "-i", multiple=True, help="Include file patterns")
 @click.option("--exclude", "-e", multiple=True, help="Exclude file patterns")
+@click.option("--no-cache", is_flag=True, help="Re-analyze every file, ignoring cached results")
 @click.option("--verbose", "-v", is_flag=True, help="Verbose output")
 def scan(
     target: str,
@@ -33,6 +33,7 @@ def scan(
     branch: Optional[str],
     include: tuple,
     exclude: tuple,
+    no_cache: bool,
     verbose: bool,
 ) -> None:
     """
@@ -60,6 +61,7 @@ def scan(
                 branch=branch,
                 include_patterns=list(include) if include else None,
                 exclude_patterns=list(exclude) if exclude else None,
+                use_cache=not no_cache,
             )
 
             # Display summary
@@ -70,12 +72,16 @@ def scan(
                 export_result(result, output, format)
             else:
                 # Print JSON to stdout
-                print(json.dumps(result.model_dump(), indent=2, default=str))
+                sys.stdout.flush()
+                sys.stdout.buffer.write(dump_scan_result_json(result, indent=2))
+                sys.stdout.buffer.write(b"\n")
 
         except Exception as e:
             console.print(f"[bold red]Error:[/bold red] {str(e)}")
             logger.exception("Scan failed")
             sys.exit(1)
+        finally:
+            await scanner.aclose()
 
     asyncio.run(run_scan())
 
@@ -93,6 +99,8 @@ def display_summary(result) -> None:
     table.add_row("Total Issues", str(len(result.issues)))
 
     if isinstance(result.summary, dict):
+        if "prefiltered_files" in result.summary:
+            table.add_row("Prefiltered Files", str(result.summary["prefiltered_files"]))
         by_severity = result.summary.get("by_severity", {})
         table.add_row("Critical", str(by_severity.get("critical", 0)))
         table.add_row("High", str(by_severity.get("high", 0)))
@@ -108,8 +116,7 @@ def export_result(result, output_path: str, format: str) -> None:
     output_file = Path(output_path)
 
     if format == "json":
-        with open(output_file, "w") as f:
-            json.dump(result.model_dump(), f, indent=2, default=str)
+        output_file.write_bytes(dump_scan_result_json(result, indent=2))
     elif format == "sarif":
         # TODO: Implement SARIF export
         console.print("[yellow]SARIF export not yet implemented[/yellow]")
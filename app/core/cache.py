@@ -0,0 +1,86 @@
+"""Caching of LLM analysis results."""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import orjson
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+class AnalysisCache:
+    """Cache analysis results in process memory or in Redis."""
+
+    def __init__(
+        self,
+        backend: str = "memory",
+        max_entries: int = 10_000,
+        ttl_seconds: int = 86400,
+    ) -> None:
+        """
+        Initialize analysis cache.
+
+        Args:
+            backend: "memory" (per-process LRU), "redis" (shared across workers) or "none"
+            max_entries: Maximum entries kept by the memory backend
+            ttl_seconds: Expiry of Redis entries
+        """
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._redis: Optional[redis.Redis] = None
+        if backend == "redis":
+            self._redis = redis.Redis.from_url(settings.redis_url)
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from a content hash of the given parts."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode("utf-8", errors="ignore"))
+            digest.update(b"\0")
+        return f"codeguard:analysis:{digest.hexdigest()}"
+
+    async def aclose(self) -> None:
+        """Close the Redis connection pool, if there is one."""
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result, or None on a miss."""
+        if self._redis is not None:
+            try:
+                value = await self._redis.get(key)
+            except Exception as e:
+                logger.warning("Analysis cache read failed", error=str(e))
+                return None
+            return orjson.loads(value) if value is not None else None
+
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result."""
+        if self.backend == "none":
+            return
+
+        if self._redis is not None:
+            try:
+                await self._redis.setex(key, self.ttl_seconds, orjson.dumps(value))
+            except Exception as e:
+                logger.warning("Analysis cache write failed", error=str(e))
+            return
+
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
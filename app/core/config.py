@@ -42,6 +42,14 @@ class Settings(BaseSettings):
     postgres_user: str = "codeguard"
     postgres_password: str = "codeguard"
     postgres_db: str = "codeguard"
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_timeout: int = 30
+    database_pool_recycle: int = 1800
+    database_pooler_mode: str = Field(
+        default="sqlalchemy",
+        description="Connection pooling: 'sqlalchemy' (in-process pool) or 'pgbouncer' (external pooler)",
+    )
 
     # Qdrant
     qdrant_host: str = "localhost"
@@ -49,16 +57,58 @@ class Settings(BaseSettings):
     qdrant_api_key: str | None = None
     qdrant_collection_name: str = "codeguard_embeddings"
 
+    # Embeddings
+    embedding_backend: str = Field(
+        default="onnx",
+        description="Embedding inference backend: 'onnx' (ONNX Runtime) or 'torch'",
+    )
+    embedding_onnx_file: str = Field(
+        default="onnx/model_quint8_avx2.onnx",
+        description="ONNX export of the model to load; use onnx/model_qint8_avx512_vnni.onnx on VNNI CPUs",
+    )
+    embedding_multi_process: bool = Field(
+        default=True,
+        description="Encode large batches on a pool of worker processes (one per CPU)",
+    )
+
+    # Chunking
+    chunk_workers: int = Field(
+        default=0,
+        description="Worker processes for chunking large scans (0: one per CPU, 1: chunk in-process)",
+    )
+
+    # Redis (Celery broker)
+    redis_url: str = "redis://localhost:6379/0"
+
     # LLM - Ollama
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "codellama:34b-instruct"
     ollama_fallback_model: str = "deepseek-coder:33b"
+    llm_concurrency: int = Field(
+        default=4,
+        description="Maximum concurrent LLM requests per scan (match the LLM server's parallelism)",
+    )
+    llm_skip_clean_max_bytes: int = Field(
+        default=2048,
+        description="Skip LLM analysis of files up to this size that match no risky pattern (0 disables)",
+    )
+    llm_pack_max_files: int = Field(
+        default=6,
+        description="Small files of one language analyzed per LLM request (1 disables packing)",
+    )
 
     # LLM - OpenAI
     openai_api_key: str | None = None
     openai_model: str = "gpt-4o"
     use_openai_fallback: bool = False
 
+    # LLM - Result cache
+    llm_cache_backend: str = Field(
+        default="memory",
+        description="Analysis cache: 'memory' (per process), 'redis' (shared) or 'none'",
+    )
+    llm_cache_ttl_seconds: int = 86400
+
     # GitHub
     github_app_id: str | None = None
     github_app_private_key: str | None = None
@@ -87,6 +137,11 @@ class Settings(BaseSettings):
     # Security
     allowed_origins: str = "http://localhost:3000,http://localhost:5173"
     max_file_size_mb: int = 100
+    max_upload_size_mb: int = 500
+    upload_dir: str = Field(
+        default="/tmp/codeguard-uploads",
+        description="Directory for extracted uploads; must be shared with scan workers",
+    )
     max_scan_duration_seconds: int = 3600
 
     @field_validator("cors_origins", "allowed_origins")
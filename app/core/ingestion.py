@@ -1,14 +1,17 @@
 """Code ingestion from GitHub repositories and local directories."""
 
+import asyncio
 import os
+import re
 import shutil
 import tempfile
-from pathlib import Path
-from typing import List, Optional
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import translate
+from typing import IO, AsyncIterator, Iterator, List, Optional, Tuple
 
 import git
 from github import Github
-from git import Repo
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
@@ -39,6 +42,29 @@ SUPPORTED_EXTENSIONS = {
     ".tfvars",
 }
 
+# Language by file extension
+LANGUAGE_MAP = {
+    ".py": "python",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".java": "java",
+    ".go": "go",
+    ".rs": "rust",
+    ".cpp": "cpp",
+    ".c": "c",
+    ".h": "c",
+    ".hpp": "cpp",
+    ".php": "php",
+    ".rb": "ruby",
+    ".sh": "shell",
+    ".yml": "yaml",
+    ".yaml": "yaml",
+    ".json": "json",
+    ".dockerfile": "dockerfile",
+    ".tf": "terraform",
+    ".tfvars": "terraform",
+}
+
 # Directories to ignore
 IGNORE_DIRS = {
     ".git",
@@ -58,6 +84,71 @@ IGNORE_DIRS = {
     ".vscode",
 }
 
+# Extensions without the leading dot, for matching against file names
+_SUPPORTED_SUFFIXES = frozenset(ext[1:] for ext in SUPPORTED_EXTENSIONS)
+
+# Bytes found in text files; deleting them from a file leaves only the binary bytes
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7F})
+
+# Files whose sample is more than this fraction non-text bytes are treated as binary
+BINARY_BYTES_RATIO = 0.3
+
+# Bytes sampled from the start of a file for the binary check
+BINARY_SAMPLE_SIZE = 8192
+
+
+def _is_binary(data: bytes) -> bool:
+    """Guess whether file content is binary from a sample of its bytes."""
+    sample = data[:BINARY_SAMPLE_SIZE]
+    if b"\0" in sample:
+        return True
+    return len(sample.translate(None, _TEXT_BYTES)) > len(sample) * BINARY_BYTES_RATIO
+
+
+def _iter_files(directory: str) -> Iterator[os.DirEntry]:
+    """Recursively yield file entries under a directory, pruning ignored directories."""
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORE_DIRS:
+                        yield from _iter_files(entry.path)
+                elif entry.is_file():
+                    yield entry
+    except OSError as e:
+        logger.warning("Failed to list directory", path=directory, error=str(e))
+
+
+def _read_file(file_path: str, max_bytes: int) -> Optional[Tuple[str, int, int]]:
+    """
+    Read a file once as bytes.
+
+    Args:
+        file_path: Path of the file to read
+        max_bytes: Maximum file size to accept
+
+    Returns:
+        Decoded content, size in bytes and line count, or None if the file
+        cannot be read, exceeds the size limit or is binary
+    """
+    try:
+        with open(file_path, "rb") as f:
+            # Bounded read guards against files that grew since they were stat'ed
+            data = f.read(max_bytes + 1)
+    except Exception as e:
+        logger.warning("Failed to read file", path=file_path, error=str(e))
+        return None
+
+    if len(data) > max_bytes:
+        logger.warning("Skipping oversized file", path=file_path)
+        return None
+
+    if _is_binary(data):
+        logger.debug("Skipping binary file", path=file_path)
+        return None
+
+    return data.decode("utf-8", errors="ignore"), len(data), data.count(b"\n") + 1
+
 
 class CodeIngestion:
     """Handle code ingestion from various sources."""
@@ -90,123 +181,183 @@ class CodeIngestion:
         if output_dir is None:
             output_dir = tempfile.mkdtemp(prefix="codeguard_")
 
+        command = ["git", "clone", "--depth", "1", "--single-branch", "--filter=blob:none"]
+        if branch:
+            command.extend(["--branch", branch])
+        command.extend(["--", repository_url, output_dir])
+
+        # Run git in a subprocess so the clone does not block the event loop
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+
+        if proc.returncode != 0:
+            error = stderr.decode("utf-8", errors="ignore").strip()
+            logger.error("Failed to clone repository", error=error)
+            raise git.exc.GitCommandError(command, proc.returncode, error)
+
+        logger.info("Repository cloned", path=output_dir, branch=branch)
+        return output_dir
+
+    def extract_archive(self, archive: IO[bytes], output_dir: str) -> str:
+        """
+        Extract an uploaded zip archive.
+
+        Members larger than max_file_size_mb are skipped, and extraction stops
+        if the total uncompressed size exceeds max_upload_size_mb.
+
+        Args:
+            archive: Seekable binary file containing the zip archive
+            output_dir: Directory to extract into
+
+        Returns:
+            Path to the extracted directory
+
+        Raises:
+            ValueError: If the archive is invalid or too large when uncompressed
+        """
+        max_bytes = settings.max_file_size_mb * 1024 * 1024
+        max_total = settings.max_upload_size_mb * 1024 * 1024
+        total = 0
+
         try:
-            repo = Repo.clone_from(
-                repository_url,
-                output_dir,
-                branch=branch,
-                depth=1,
-            )
-            logger.info("Repository cloned", path=output_dir, branch=repo.active_branch.name)
-            return output_dir
-        except git.exc.GitCommandError as e:
-            logger.error("Failed to clone repository", error=str(e))
-            raise
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    if info.file_size > max_bytes:
+                        logger.warning("Skipping oversized archive member", member=info.filename)
+                        continue
+
+                    total += info.file_size
+                    if total > max_total:
+                        raise ValueError(
+                            f"Archive exceeds {settings.max_upload_size_mb} MB when uncompressed"
+                        )
+                    zf.extract(info, output_dir)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Invalid zip archive: {e}") from e
+
+        logger.info("Archive extracted", path=output_dir, bytes=total)
+        return output_dir
 
     async def scan_directory(
         self,
         directory: str,
         include_patterns: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
-    ) -> List[dict]:
+    ) -> AsyncIterator[dict]:
         """
         Scan directory for code files.
 
+        Files are read in small concurrent batches and yielded one at a time, so
+        only the current batch is held in memory.
+
         Args:
             directory: Directory to scan
             include_patterns: File patterns to include
             exclude_patterns: File patterns to exclude
 
-        Returns:
-            List of file information dictionaries
+        Yields:
+            File information dictionaries
         """
         logger.info("Scanning directory", path=directory)
-        files = []
 
-        directory_path = Path(directory)
-        if not directory_path.exists():
+        if not os.path.exists(directory):
             raise ValueError(f"Directory does not exist: {directory}")
 
-        for root, dirs, filenames in os.walk(directory_path):
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+        # Compile glob patterns once rather than per file
+        include = [re.compile(translate(pattern)) for pattern in include_patterns or []]
+        exclude = [re.compile(translate(pattern)) for pattern in exclude_patterns or []]
 
-            for filename in filenames:
-                file_path = Path(root) / filename
+        # Bind per-file lookups to locals ahead of the walk
+        max_bytes = settings.max_file_size_mb * 1024 * 1024
+        supported = _SUPPORTED_SUFFIXES
+        detect_language = self._detect_language
+        prefix_len = len(os.path.join(directory, ""))
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        loop = asyncio.get_running_loop()
+        files_found = 0
 
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            batch = []
+            for entry in _iter_files(directory):
                 # Check if file extension is supported
-                if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+                _, dot, extension = entry.name.rpartition(".")
+                extension = extension.lower()
+                if not dot or extension not in supported:
                     continue
 
                 # Check include/exclude patterns
-                relative_path = file_path.relative_to(directory_path)
-                if exclude_patterns and any(
-                    self._match_pattern(str(relative_path), pattern)
-                    for pattern in exclude_patterns
-                ):
+                relative_path = entry.path[prefix_len:]
+                if exclude and any(regex.match(relative_path) for regex in exclude):
                     continue
 
-                if include_patterns and not any(
-                    self._match_pattern(str(relative_path), pattern)
-                    for pattern in include_patterns
-                ):
+                if include and not any(regex.match(relative_path) for regex in include):
                     continue
 
+                # Skip oversized files before opening them
                 try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                except Exception as e:
-                    logger.warning("Failed to read file", path=str(file_path), error=str(e))
+                    if entry.stat().st_size > max_bytes:
+                        logger.warning("Skipping oversized file", path=entry.path)
+                        continue
+                except OSError as e:
+                    logger.warning("Failed to stat file", path=entry.path, error=str(e))
                     continue
 
-                files.append(
-                    {
-                        "path": str(relative_path),
-                        "absolute_path": str(file_path),
-                        "content": content,
-                        "language": self._detect_language(file_path.suffix),
-                        "size": len(content),
-                        "lines": content.count("\n") + 1,
-                    }
-                )
+                batch.append((entry.path, relative_path, detect_language("." + extension)))
+                if len(batch) >= workers:
+                    async for file_info in self._read_batch(batch, max_bytes, pool, loop):
+                        files_found += 1
+                        yield file_info
+                    batch = []
+
+            async for file_info in self._read_batch(batch, max_bytes, pool, loop):
+                files_found += 1
+                yield file_info
 
-        logger.info("Directory scan complete", files_found=len(files))
-        return files
+        logger.info("Directory scan complete", files_found=files_found)
+
+    async def _read_batch(
+        self,
+        batch: List[tuple],
+        max_bytes: int,
+        pool: ThreadPoolExecutor,
+        loop: asyncio.AbstractEventLoop,
+    ) -> AsyncIterator[dict]:
+        """Read a batch of files concurrently and yield their file information."""
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(pool, _read_file, file_path, max_bytes)
+                for file_path, _, _ in batch
+            ]
+        )
 
-    def _match_pattern(self, path: str, pattern: str) -> bool:
-        """Match file path against pattern (supports glob)."""
-        from fnmatch import fnmatch
+        for (file_path, relative_path, language), result in zip(batch, results):
+            if result is None:
+                continue
 
-        return fnmatch(path, pattern)
+            content, size, lines = result
+            yield {
+                "path": relative_path,
+                "absolute_path": file_path,
+                "content": content,
+                "language": language,
+                "size": size,
+                "lines": lines,
+            }
 
     def _detect_language(self, extension: str) -> str:
         """Detect programming language from file extension."""
-        language_map = {
-            ".py": "python",
-            ".js": "javascript",
-            ".ts": "typescript",
-            ".java": "java",
-            ".go": "go",
-            ".rs": "rust",
-            ".cpp": "cpp",
-            ".c": "c",
-            ".h": "c",
-            ".hpp": "cpp",
-            ".php": "php",
-            ".rb": "ruby",
-            ".sh": "shell",
-            ".yml": "yaml",
-            ".yaml": "yaml",
-            ".json": "json",
-            ".dockerfile": "dockerfile",
-            ".tf": "terraform",
-            ".tfvars": "terraform",
-        }
-        return language_map.get(extension.lower(), "unknown")
+        return LANGUAGE_MAP.get(extension.lower(), "unknown")
 
     def cleanup(self, directory: str) -> None:
-        """Clean up temporary directory."""
-        if os.path.exists(directory) and directory.startswith(tempfile.gettempdir()):
+        """Clean up a temporary or extracted upload directory."""
+        roots = (tempfile.gettempdir(), os.path.abspath(settings.upload_dir))
+        if os.path.exists(directory) and os.path.abspath(directory).startswith(roots):
             try:
                 shutil.rmtree(directory)
                 logger.info("Cleaned up temporary directory", path=directory)
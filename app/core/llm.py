@@ -1,18 +1,85 @@
 """LLM integration for code analysis."""
 
-import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 import ollama
-from openai import AsyncOpenAI
+import orjson
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
+from app.core.cache import AnalysisCache
 from app.core.config import get_settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+OPENAI_SYSTEM_PROMPT = (
+    "You are an expert security engineer and code reviewer. Always respond with valid JSON only."
+)
+
+# Static parts of the analysis prompt, built once rather than per file
+PROMPT_TASKS = """1. **Vulnerabilities**: Detect OWASP Top 10, CWE patterns, insecure functions, hardcoded secrets, weak crypto, SQL injection, XSS, RCE, etc.
+2. **Code Review**: Suggest improvements for performance, readability, idioms, refactoring, design patterns.
+3. **Auto-Comments**: Add inline comments explaining complex logic, edge cases, or missing documentation."""
+
+PROMPT_OUTPUT_FORMAT = """## Output Format (JSON):
+
+{
+  "vulnerabilities": [
+    {
+      "severity": "critical|high|medium|low",
+      "title": "Vulnerability title",
+      "description": "Detailed description",
+      "start_line": 10,
+      "end_line": 15,
+      "cwe_id": "CWE-79",
+      "owasp_category": "A03:2021 – Injection",
+      "suggestion": "How to fix",
+      "code_snippet": "vulnerable code",
+      "fixed_code": "fixed code"
+    }
+  ],
+  "code_review": [
+    {
+      "severity": "info|low|medium",
+      "title": "Review finding title",
+      "description": "Description",
+      "start_line": 20,
+      "end_line": 25,
+      "suggestion": "Improvement suggestion",
+      "code_snippet": "current code",
+      "fixed_code": "improved code"
+    }
+  ],
+  "auto_comments": [
+    {
+      "line": 30,
+      "comment": "Explanation of complex logic"
+    }
+  ]
+}
+
+Return ONLY valid JSON, no markdown formatting or additional text."""
+
+# Truncate very large files so the prompt stays within the model context
+MAX_PROMPT_CODE_CHARS = 60_000
+
+# Output tokens allowed per analyzed file, and in total for a packed request
+MAX_OUTPUT_TOKENS = 4000
+MAX_PACKED_OUTPUT_TOKENS = 8000
+
+# Retrieved context chunks used in a single-file prompt, and per file in a packed one
+MAX_CONTEXT_CHUNKS = 3
+PACKED_CONTEXT_CHUNKS_PER_FILE = 2
+
+# Connections kept open to each LLM provider. Several scans can run at once, each
+# with up to llm_concurrency requests in flight
+LLM_MAX_CONNECTIONS = 64
+
+# Part of every cache key, so editing the prompt invalidates earlier results
+PROMPT_FINGERPRINT = AnalysisCache.make_key(OPENAI_SYSTEM_PROMPT, PROMPT_TASKS, PROMPT_OUTPUT_FORMAT)
+
 
 class LLMEngine:
     """LLM engine for code analysis."""
@@ -22,24 +89,61 @@ class LLMEngine:
         self.ollama_client = None
         self.openai_client = None
 
+        # Each client keeps one connection pool for the engine's lifetime, so
+        # concurrent analyses reuse open connections instead of reconnecting
+        limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+        )
+
         # Initialize Ollama
         try:
-            self.ollama_client = ollama.Client(host=settings.ollama_base_url)
+            self.ollama_client = ollama.AsyncClient(host=settings.ollama_base_url, limits=limits)
             logger.info("Ollama client initialized", url=settings.ollama_base_url)
         except Exception as e:
             logger.warning("Failed to initialize Ollama", error=str(e))
 
         # Initialize OpenAI if API key is provided
         if settings.openai_api_key:
-            self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+            # HTTP/2 multiplexes concurrent requests over a single TLS connection
+            self.openai_client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=DefaultAsyncHttpxClient(http2=True, limits=limits),
+            )
             logger.info("OpenAI client initialized")
 
+        self.cache = AnalysisCache(
+            backend=settings.llm_cache_backend,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+        )
+
+        # Resolve provider settings once rather than on every analysis
+        self._openai_enabled = self.openai_client is not None and settings.use_openai_fallback
+        self._ollama_models = [settings.ollama_model]
+        if settings.ollama_fallback_model != settings.ollama_model:
+            self._ollama_models.append(settings.ollama_fallback_model)
+
+    async def aclose(self) -> None:
+        """Close the LLM clients' and the analysis cache's connection pools."""
+        if self.ollama_client is not None:
+            # AsyncClient.close() is missing from older ollama releases, which expose
+            # only the underlying httpx client
+            close = getattr(self.ollama_client, "close", None)
+            if close is not None:
+                await close()
+            else:
+                await self.ollama_client._client.aclose()
+        if self.openai_client is not None:
+            await self.openai_client.close()
+        await self.cache.aclose()
+
     async def analyze_code(
         self,
         code: str,
         language: str,
         file_path: str,
         context: Optional[List[Dict[str, Any]]] = None,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         Analyze code for vulnerabilities, review, and auto-comment.
@@ -49,27 +153,26 @@ class LLMEngine:
             language: Programming language
             file_path: File path
             context: Optional RAG context chunks
+            use_cache: Return a cached result for identical code if there is one
+                (fresh results are cached either way)
 
         Returns:
             Analysis results dictionary
         """
-        prompt = self._build_analysis_prompt(code, language, file_path, context)
-
-        try:
-            # Try Ollama first
-            if self.ollama_client:
-                result = await self._analyze_with_ollama(prompt)
-                if result:
-                    return result
-        except Exception as e:
-            logger.warning("Ollama analysis failed", error=str(e))
+        # Keyed on the file's content rather than the full prompt, so files that are
+        # unchanged between scans hit even when their retrieved context shifts
+        cache_key = self.cache.make_key(settings.ollama_model, PROMPT_FINGERPRINT, language, code)
+        if use_cache:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Analysis cache hit", file_path=file_path)
+                return cached
 
-        # Fallback to OpenAI
-        if self.openai_client and settings.use_openai_fallback:
-            try:
-                return await self._analyze_with_openai(prompt)
-            except Exception as e:
-                logger.error("OpenAI analysis failed", error=str(e))
+        prompt = self._build_analysis_prompt(code, language, file_path, context)
+        result = await self._generate(prompt, MAX_OUTPUT_TOKENS)
+        if result is not None:
+            await self.cache.set(cache_key, result)
+            return result
 
         # Return empty result if all fail
         logger.error("All LLM providers failed")
@@ -79,6 +182,64 @@ class LLMEngine:
             "auto_comments": [],
         }
 
+    async def analyze_files(
+        self,
+        files: List[Dict[str, str]],
+        language: str,
+        contexts: Optional[List[List[Dict[str, Any]]]] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze several small files of one language in a single LLM request.
+
+        The instructions and output format are sent once for all files rather than
+        once per file. Results are cached per file, like those of analyze_code.
+
+        Args:
+            files: Files to analyze, as dictionaries with "path" and "code"
+            language: Programming language of every file
+            contexts: Optional RAG context chunks retrieved for each file, in the order of files
+            use_cache: Return cached results for identical code where there are some
+
+        Returns:
+            Analysis results by file path. Files missing from the model's answer are
+            left out, so callers can analyze them on their own.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        keys = {
+            file["path"]: self.cache.make_key(
+                settings.ollama_model, PROMPT_FINGERPRINT, language, file["code"]
+            )
+            for file in files
+        }
+        if use_cache:
+            for file in files:
+                cached = await self.cache.get(keys[file["path"]])
+                if cached is not None:
+                    results[file["path"]] = cached
+
+        pending = [file for file in files if file["path"] not in results]
+        if not pending:
+            return results
+
+        file_contexts = dict(zip((file["path"] for file in files), contexts or []))
+        prompt = self._build_packed_prompt(
+            pending, language, [file_contexts.get(file["path"], []) for file in pending]
+        )
+        analyses = await self._generate(
+            prompt, min(MAX_OUTPUT_TOKENS * len(pending), MAX_PACKED_OUTPUT_TOKENS)
+        )
+        if analyses is None:
+            logger.error("All LLM providers failed", files=len(pending))
+            return results
+
+        for file in pending:
+            result = analyses.get(file["path"])
+            if isinstance(result, dict):
+                await self.cache.set(keys[file["path"]], result)
+                results[file["path"]] = result
+        return results
+
     def _build_analysis_prompt(
         self,
         code: str,
@@ -87,17 +248,14 @@ class LLMEngine:
         context: Optional[List[Dict[str, Any]]] = None,
     ) -> str:
         """Build analysis prompt for LLM."""
-        context_text = ""
-        if context:
-            context_text = "\n\n## Related Code Context:\n"
-            for ctx in context[:3]:  # Use top 3 context chunks
-                context_text += f"\n### {ctx.get('file_path', 'unknown')} (lines {ctx.get('start_line', 0)}-{ctx.get('end_line', 0)}):\n```{ctx.get('language', '')}\n{ctx.get('content', '')}\n```\n"
+        if len(code) > MAX_PROMPT_CODE_CHARS:
+            code = code[:MAX_PROMPT_CODE_CHARS]
 
-        prompt = f"""You are an expert security engineer and code reviewer. Analyze the following {language} code for:
+        context_text = self._format_context((context or [])[:MAX_CONTEXT_CHUNKS])
 
-1. **Vulnerabilities**: Detect OWASP Top 10, CWE patterns, insecure functions, hardcoded secrets, weak crypto, SQL injection, XSS, RCE, etc.
-2. **Code Review**: Suggest improvements for performance, readability, idioms, refactoring, design patterns.
-3. **Auto-Comments**: Add inline comments explaining complex logic, edge cases, or missing documentation.
+        return f"""You are an expert security engineer and code reviewer. Analyze the following {language} code for:
+
+{PROMPT_TASKS}
 
 {context_text}
 
@@ -110,98 +268,126 @@ Language: {language}
 {code}
 ```
 
-## Output Format (JSON):
+{PROMPT_OUTPUT_FORMAT}"""
 
-{{
-  "vulnerabilities": [
-    {{
-      "severity": "critical|high|medium|low",
-      "title": "Vulnerability title",
-      "description": "Detailed description",
-      "start_line": 10,
-      "end_line": 15,
-      "cwe_id": "CWE-79",
-      "owasp_category": "A03:2021 – Injection",
-      "suggestion": "How to fix",
-      "code_snippet": "vulnerable code",
-      "fixed_code": "fixed code"
-    }}
-  ],
-  "code_review": [
-    {{
-      "severity": "info|low|medium",
-      "title": "Review finding title",
-      "description": "Description",
-      "start_line": 20,
-      "end_line": 25,
-      "suggestion": "Improvement suggestion",
-      "code_snippet": "current code",
-      "fixed_code": "improved code"
-    }}
-  ],
-  "auto_comments": [
-    {{
-      "line": 30,
-      "comment": "Explanation of complex logic"
-    }}
-  ]
-}}
+    def _build_packed_prompt(
+        self,
+        files: List[Dict[str, str]],
+        language: str,
+        contexts: Optional[List[List[Dict[str, Any]]]] = None,
+    ) -> str:
+        """Build one analysis prompt covering several files."""
+        paths = {file["path"] for file in files}
+        # Every file contributes its own most relevant chunks. Chunks of the packed files
+        # themselves add nothing; drop them and duplicates
+        unique_context: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        for file_context in contexts or []:
+            related = [ctx for ctx in file_context if ctx.get("file_path") not in paths]
+            for ctx in related[:PACKED_CONTEXT_CHUNKS_PER_FILE]:
+                unique_context.setdefault((ctx.get("file_path"), ctx.get("start_line")), ctx)
+        context_text = self._format_context(list(unique_context.values()))
+
+        files_text = "".join(
+            f"\n### File: {file['path']}\n\n```{language}\n{file['code']}\n```\n"
+            for file in files
+        )
 
-Return ONLY valid JSON, no markdown formatting or additional text."""
+        return f"""You are an expert security engineer and code reviewer. Analyze each of the following {language} files for:
 
-        return prompt
+{PROMPT_TASKS}
 
-    async def _analyze_with_ollama(self, prompt: str) -> Optional[Dict[str, Any]]:
-        """Analyze code using Ollama."""
-        try:
-            response = self.ollama_client.generate(
-                model=settings.ollama_model,
-                prompt=prompt,
-                options={
-                    "temperature": 0.1,
-                    "num_predict": 4000,
-                },
+{context_text}
+
+## Files to Analyze:
+{files_text}
+Return a JSON object mapping every file path above to that file's analysis, with line numbers counted within the file. Each file's analysis uses this format:
+
+{PROMPT_OUTPUT_FORMAT}"""
+
+    @staticmethod
+    def _format_context(context: Optional[List[Dict[str, Any]]]) -> str:
+        """Format retrieved context chunks as a prompt section."""
+        if not context:
+            return ""
+
+        parts = ["\n\n## Related Code Context:\n"]
+        for ctx in context:
+            parts.append(
+                f"\n### {ctx.get('file_path', 'unknown')} (lines {ctx.get('start_line', 0)}-{ctx.get('end_line', 0)}):\n```{ctx.get('language', '')}\n{ctx.get('content', '')}\n```\n"
             )
+        return "".join(parts)
 
-            result_text = response.get("response", "")
-            # Extract JSON from response
-            json_text = self._extract_json(result_text)
-            return json.loads(json_text)
+    async def _generate(self, prompt: str, max_tokens: int) -> Optional[Dict[str, Any]]:
+        """Run a prompt on Ollama, falling back to OpenAI; None if every provider fails."""
+        try:
+            # Try Ollama first
+            if self.ollama_client:
+                result = await self._analyze_with_ollama(prompt, max_tokens)
+                if result:
+                    return result
         except Exception as e:
-            logger.error("Ollama analysis error", error=str(e))
-            # Try fallback model
-            if settings.ollama_fallback_model != settings.ollama_model:
-                try:
-                    response = self.ollama_client.generate(
-                        model=settings.ollama_fallback_model,
-                        prompt=prompt,
-                        options={"temperature": 0.1, "num_predict": 4000},
-                    )
-                    result_text = response.get("response", "")
-                    json_text = self._extract_json(result_text)
-                    return json.loads(json_text)
-                except Exception as e2:
-                    logger.error("Ollama fallback model error", error=str(e2))
-            return None
-
-    async def _analyze_with_openai(self, prompt: str) -> Dict[str, Any]:
+            logger.warning("Ollama analysis failed", error=str(e))
+
+        # Fallback to OpenAI
+        if self._openai_enabled:
+            try:
+                return await self._analyze_with_openai(prompt, max_tokens)
+            except Exception as e:
+                logger.error("OpenAI analysis failed", error=str(e))
+
+        return None
+
+    async def _analyze_with_ollama(
+        self, prompt: str, max_tokens: int = MAX_OUTPUT_TOKENS
+    ) -> Optional[Dict[str, Any]]:
+        """Analyze code using Ollama, trying the fallback model if the primary fails."""
+        for model in self._ollama_models:
+            try:
+                return await self._generate_with_ollama(model, prompt, max_tokens)
+            except Exception as e:
+                logger.error("Ollama analysis error", model=model, error=str(e))
+        return None
+
+    async def _generate_with_ollama(
+        self, model: str, prompt: str, max_tokens: int = MAX_OUTPUT_TOKENS
+    ) -> Dict[str, Any]:
+        """Run a single Ollama generation and parse its JSON output."""
+        response = await self.ollama_client.generate(
+            model=model,
+            prompt=prompt,
+            format="json",
+            options={
+                "temperature": 0.1,
+                "num_predict": max_tokens,
+            },
+        )
+
+        return self._parse_json(response.get("response", ""))
+
+    async def _analyze_with_openai(
+        self, prompt: str, max_tokens: int = MAX_OUTPUT_TOKENS
+    ) -> Dict[str, Any]:
         """Analyze code using OpenAI."""
         response = await self.openai_client.chat.completions.create(
             model=settings.openai_model,
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert security engineer and code reviewer. Always respond with valid JSON only.",
-                },
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
             temperature=0.1,
-            max_tokens=4000,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
         )
 
         result_text = response.choices[0].message.content or "{}"
-        json_text = self._extract_json(result_text)
-        return json.loads(json_text)
+        return self._parse_json(result_text)
+
+    def _parse_json(self, text: str) -> Dict[str, Any]:
+        """Parse model output as JSON, extracting an embedded object only as a last resort."""
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            return orjson.loads(self._extract_json(text))
 
     def _extract_json(self, text: str) -> str:
         """Extract JSON from text response."""
@@ -1,15 +1,43 @@
 """Structured logging configuration."""
 
+import atexit
+import functools
 import logging
+import os
+import queue
 import sys
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
 
+import orjson
 import structlog
 from structlog.types import Processor
 
+# Log records are handed to a background thread so writing to stdout never blocks callers
+LOG_QUEUE_SIZE = 10000
+
+_listener: Optional[QueueListener] = None
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of erroring when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """Serialize a log event with orjson for the stdlib logging pipeline."""
+    return orjson.dumps(obj, **kwargs).decode()
+
 
 def setup_logging(log_level: str = "INFO", log_format: str = "json") -> None:
     """Configure structured logging."""
+    global _listener
+
     processors: list[Processor] = [
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
@@ -21,7 +49,7 @@ def setup_logging(log_level: str = "INFO", log_format: str = "json") -> None:
         processors.extend(
             [
                 structlog.processors.TimeStamper(fmt="iso"),
-                structlog.processors.JSONRenderer(),
+                structlog.processors.JSONRenderer(serializer=_orjson_dumps),
             ]
         )
     else:
@@ -38,19 +66,55 @@ def setup_logging(log_level: str = "INFO", log_format: str = "json") -> None:
             logging.getLevelName(log_level.upper())
         ),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
-    # Configure standard library logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=log_level.upper(),
-    )
+    # Configure standard library logging to write through a bounded queue
+    shutdown_logging()
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [_DroppingQueueHandler(log_queue)]
+    root_logger.setLevel(log_level.upper())
 
 
+def shutdown_logging() -> None:
+    """Stop the background log writer, flushing queued records."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_in_child() -> None:
+    """Start a log writer in a forked child, which inherits the queue but not the thread."""
+    global _listener
+
+    if _listener is None:
+        return
+
+    # The parent's queue may have been locked mid-operation at fork time, so the child
+    # gets a fresh one
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+@functools.lru_cache(maxsize=256)
 def get_logger(name: str) -> structlog.BoundLogger:
     """Get a structured logger instance."""
     return structlog.get_logger(name)
-
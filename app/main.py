@@ -4,11 +4,12 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.routes import router
 from app.core.config import get_settings
 from app.core.database import init_db
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
 
 settings = get_settings()
 setup_logging(settings.log_level, settings.log_format)
@@ -21,7 +22,7 @@ async def lifespan(app: FastAPI):
     await init_db()
     yield
     # Shutdown
-    pass
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -29,6 +30,7 @@ app = FastAPI(
     version=settings.app_version,
     description="AI-powered Codebase Vulnerability Scanner, Reviewer, and Auto-Commenter",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
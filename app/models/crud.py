@@ -0,0 +1,282 @@
+"""Database access for scans and their issues."""
+
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.database import Issue as IssueRecord
+from app.models.database import Scan as ScanRecord
+from app.models.schemas import (
+    Issue,
+    IssueType,
+    Location,
+    ScanRequest,
+    ScanResponse,
+    ScanResult,
+    ScanStatus,
+    Severity,
+)
+
+
+async def create_scan(session: AsyncSession, scan_id: str, request: ScanRequest) -> ScanRecord:
+    """
+    Insert a pending scan record.
+
+    Args:
+        session: Database session
+        scan_id: Scan identifier
+        request: Scan request parameters
+
+    Returns:
+        Created scan record
+    """
+    scan = ScanRecord(
+        id=scan_id,
+        repository_url=str(request.repository_url) if request.repository_url else None,
+        repository_path=request.repository_path,
+        branch=request.branch,
+        status=ScanStatus.PENDING.value,
+    )
+    session.add(scan)
+    await session.commit()
+    return scan
+
+
+async def update_scan_status(
+    session: AsyncSession,
+    scan_id: str,
+    status: ScanStatus,
+    error: Optional[str] = None,
+) -> None:
+    """
+    Update the status of a scan record.
+
+    Args:
+        session: Database session
+        scan_id: Scan identifier
+        status: New scan status
+        error: Error message to record with a failed status
+    """
+    scan = await session.get(ScanRecord, scan_id)
+    if scan is None:
+        return
+
+    scan.status = status.value
+    if error is not None:
+        scan.error = error
+    scan.updated_at = datetime.utcnow()
+    await session.commit()
+
+
+async def save_scan_result(session: AsyncSession, result: ScanResult) -> None:
+    """
+    Persist a completed scan result and its issues.
+
+    Args:
+        session: Database session
+        result: Scan result from the scanner
+    """
+    scan = await session.get(ScanRecord, result.scan_id)
+    if scan is None:
+        scan = ScanRecord(
+            id=result.scan_id,
+            repository_url=result.repository_url,
+            repository_path=result.repository_path,
+        )
+        session.add(scan)
+
+    scan.status = result.status.value
+    scan.started_at = result.started_at
+    scan.completed_at = result.completed_at
+    scan.total_files = result.total_files
+    scan.scanned_files = result.scanned_files
+    scan.total_issues = len(result.issues)
+    scan.error = result.summary.get("error")
+    scan.summary = result.summary
+    scan.updated_at = datetime.utcnow()
+
+    session.add_all(
+        IssueRecord(
+            id=issue.id,
+            scan_id=result.scan_id,
+            type=issue.type.value,
+            severity=issue.severity.value,
+            title=issue.title,
+            description=issue.description,
+            file_path=issue.location.file_path,
+            start_line=issue.location.start_line,
+            end_line=issue.location.end_line,
+            start_column=issue.location.start_column,
+            end_column=issue.location.end_column,
+            function_name=issue.location.function_name,
+            rule_id=issue.rule_id,
+            cwe_id=issue.cwe_id,
+            owasp_category=issue.owasp_category,
+            suggestion=issue.suggestion,
+            code_snippet=issue.code_snippet,
+            fixed_code=issue.fixed_code,
+            issue_metadata=issue.metadata or None,
+        )
+        for issue in result.issues
+    )
+
+    # Counted from the stored rows, so the histogram always matches the issues table
+    await session.flush()
+    scan.issues_by_severity = await count_issues_by_severity(session, result.scan_id)
+    await session.commit()
+
+
+async def count_issues_by_severity(session: AsyncSession, scan_id: str) -> Dict[str, int]:
+    """
+    Count a scan's issues per severity in the database.
+
+    Args:
+        session: Database session
+        scan_id: Scan identifier
+
+    Returns:
+        Issue count for every severity level
+    """
+    # Answered from the (scan_id, severity) index without reading issue rows
+    query = (
+        select(IssueRecord.severity, func.count())
+        .where(IssueRecord.scan_id == scan_id)
+        .group_by(IssueRecord.severity)
+    )
+    counts = dict((await session.execute(query)).all())
+    return {severity.value: counts.get(severity.value, 0) for severity in Severity}
+
+
+async def get_scan_result(session: AsyncSession, scan_id: str) -> Optional[ScanResult]:
+    """
+    Load a scan and its issues.
+
+    Args:
+        session: Database session
+        scan_id: Scan identifier
+
+    Returns:
+        Scan result, or None if the scan does not exist
+    """
+    query = (
+        select(ScanRecord)
+        .where(ScanRecord.id == scan_id)
+        .options(selectinload(ScanRecord.issues))
+    )
+    scan = (await session.execute(query)).scalar_one_or_none()
+    if scan is None:
+        return None
+
+    return ScanResult.model_construct(
+        scan_id=scan.id,
+        status=ScanStatus(scan.status),
+        repository_url=scan.repository_url,
+        repository_path=scan.repository_path,
+        started_at=scan.started_at,
+        completed_at=scan.completed_at,
+        total_files=scan.total_files,
+        scanned_files=scan.scanned_files,
+        issues=[issue_from_record(record) for record in scan.issues],
+        summary=scan.summary or {},
+    )
+
+
+async def list_scans(
+    session: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[ScanRecord], Optional[str]]:
+    """
+    List scans newest first using keyset pagination.
+
+    Args:
+        session: Database session
+        limit: Maximum number of results
+        cursor: Opaque cursor returned with the previous page
+
+    Returns:
+        Scan records and the cursor for the next page (None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    query = select(ScanRecord).order_by(ScanRecord.started_at.desc(), ScanRecord.id.desc())
+    if cursor:
+        started_at, scan_id = decode_cursor(cursor)
+        query = query.where(tuple_(ScanRecord.started_at, ScanRecord.id) < (started_at, scan_id))
+
+    # Fetch one extra row to know whether another page follows
+    records = list((await session.execute(query.limit(limit + 1))).scalars())
+    if len(records) <= limit:
+        return records, None
+
+    records = records[:limit]
+    return records, encode_cursor(records[-1].started_at, records[-1].id)
+
+
+def encode_cursor(started_at: datetime, scan_id: str) -> str:
+    """Encode a scan's sort key as an opaque pagination cursor."""
+    raw = f"{started_at.isoformat()}|{scan_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a pagination cursor into a scan's sort key."""
+    try:
+        started_at, scan_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(started_at), scan_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+# Database rows were validated on the way in, so converting them back to API
+# schemas uses model_construct and skips validation. Enum columns are stored as
+# plain strings and must be converted explicitly. Untrusted input (ScanRequest,
+# ExportRequest) always goes through normal validation.
+
+
+def scan_response_from_record(scan: ScanRecord) -> ScanResponse:
+    """Convert a scan database record to its summary response."""
+    return ScanResponse.model_construct(
+        scan_id=scan.id,
+        status=ScanStatus(scan.status),
+        repository_url=scan.repository_url,
+        repository_path=scan.repository_path,
+        started_at=scan.started_at,
+        completed_at=scan.completed_at,
+        total_files=scan.total_files,
+        scanned_files=scan.scanned_files,
+        total_issues=scan.total_issues,
+        issues_by_severity=scan.issues_by_severity or {},
+        error=scan.error,
+    )
+
+
+def issue_from_record(record: IssueRecord) -> Issue:
+    """Convert an issue database record to its API schema."""
+    return Issue.model_construct(
+        id=record.id,
+        type=IssueType(record.type),
+        severity=Severity(record.severity),
+        title=record.title,
+        description=record.description,
+        location=Location.model_construct(
+            file_path=record.file_path,
+            start_line=record.start_line,
+            end_line=record.end_line,
+            start_column=record.start_column,
+            end_column=record.end_column,
+            function_name=record.function_name,
+        ),
+        rule_id=record.rule_id,
+        cwe_id=record.cwe_id,
+        owasp_category=record.owasp_category,
+        suggestion=record.suggestion,
+        code_snippet=record.code_snippet,
+        fixed_code=record.fixed_code,
+        metadata=record.issue_metadata or {},
+    )
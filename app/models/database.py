@@ -1,15 +1,36 @@
 """SQLModel database models."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
+import orjson
+from sqlalchemy import Column, Index, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
 from sqlmodel import Field, Relationship, SQLModel
 
 
+class JSONText(TypeDecorator):
+    """JSON value stored in a text column, encoded with orjson."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[str]:
+        """Encode a value for storage."""
+        return orjson.dumps(value).decode() if value is not None else None
+
+    def process_result_value(self, value: Optional[str], dialect: Any) -> Any:
+        """Decode a stored value."""
+        return orjson.loads(value) if value is not None else None
+
+
 class Scan(SQLModel, table=True):
     """Scan record in database."""
 
     __tablename__ = "scans"
+    # Keyset pagination walks this index backwards (newest first)
+    __table_args__ = (Index("ix_scans_started_at_id", "started_at", "id"),)
 
     id: Optional[str] = Field(default=None, primary_key=True)
     repository_url: Optional[str] = None
@@ -21,19 +42,26 @@ class Scan(SQLModel, table=True):
     total_files: int = 0
     scanned_files: int = 0
     total_issues: int = 0
+    # Severity histogram written with the result, so listings never aggregate issues
+    issues_by_severity: Optional[Dict[str, int]] = Field(default=None, sa_column=Column(JSONB))
     error: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONText))
     user_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    # Relationships
-    issues: list["Issue"] = Relationship(back_populates="scan")
+    # Relationships (lazy="raise": load explicitly, e.g. selectinload, never implicitly per row)
+    issues: list["Issue"] = Relationship(
+        back_populates="scan", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
 
 class Issue(SQLModel, table=True):
     """Issue record in database."""
 
     __tablename__ = "issues"
+    # Serves per-scan issue lookups and severity aggregation
+    __table_args__ = (Index("ix_issues_scan_severity", "scan_id", "severity"),)
 
     id: Optional[str] = Field(default=None, primary_key=True)
     scan_id: str = Field(foreign_key="scans.id")
@@ -53,11 +81,14 @@ class Issue(SQLModel, table=True):
     suggestion: Optional[str] = None
     code_snippet: Optional[str] = None
     fixed_code: Optional[str] = None
-    metadata: Optional[str] = None  # JSON string
+    # "metadata" is reserved on declarative models, so the attribute is renamed
+    issue_metadata: Optional[Dict[str, Any]] = Field(
+        default=None, sa_column=Column("metadata", JSONText)
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
-    scan: Scan = Relationship(back_populates="issues")
+    scan: Scan = Relationship(back_populates="issues", sa_relationship_kwargs={"lazy": "raise"})
 
 
 class User(SQLModel, table=True):
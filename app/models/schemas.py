@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, TypeAdapter
 
 
 class Severity(str, Enum):
@@ -93,6 +93,13 @@ class ScanResponse(BaseModel):
     error: Optional[str] = None
 
 
+class ScanListResponse(BaseModel):
+    """Page of scans with a cursor for the next page."""
+
+    scans: List[ScanResponse]
+    next_cursor: Optional[str] = None
+
+
 class ScanResult(BaseModel):
     """Complete scan result with issues."""
 
@@ -108,6 +115,21 @@ class ScanResult(BaseModel):
     summary: Dict[str, Any] = Field(default_factory=dict)
 
 
+# Serializers are built once at import; constructing a TypeAdapter compiles a core schema
+_ISSUE_LIST_ADAPTER = TypeAdapter(List[Issue])
+_SCAN_RESULT_ADAPTER = TypeAdapter(ScanResult)
+
+
+def dump_issues_json(issues: List[Issue]) -> bytes:
+    """Serialize a list of issues to JSON bytes."""
+    return _ISSUE_LIST_ADAPTER.dump_json(issues)
+
+
+def dump_scan_result_json(result: ScanResult, indent: Optional[int] = None) -> bytes:
+    """Serialize a scan result to JSON bytes, optionally pretty-printed."""
+    return _SCAN_RESULT_ADAPTER.dump_json(result, indent=indent)
+
+
 class ReportFormat(str, Enum):
     """Report export formats."""
 
@@ -1,18 +1,41 @@
 """Code chunking for RAG."""
 
+import multiprocessing
 import re
-from typing import List
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Iterator, List, Optional
 
+import numpy as np
 import tiktoken
 
-from app.core.logging import get_logger
+from app.core.config import get_settings
+from app.core.logging import get_logger, setup_logging
 
 logger = get_logger(__name__)
+settings = get_settings()
 
 # Chunking parameters
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 100
 
+# Chunker of the current pool worker process, created by _init_worker
+_worker_chunker: Optional["CodeChunker"] = None
+
+# Patterns matching the first function name in a chunk, per language
+_FUNC_PATTERNS = {
+    language: re.compile(pattern)
+    for language, pattern in {
+        "python": r"def\s+(\w+)\s*\(",
+        "javascript": r"function\s+(\w+)\s*\(",
+        "typescript": r"(?:function\s+)?(\w+)\s*[=:]\s*(?:\([^)]*\)\s*)?=>",
+        "java": r"(?:public|private|protected)?\s*\w+\s+(\w+)\s*\(",
+        "go": r"func\s+(\w+)\s*\(",
+        "rust": r"fn\s+(\w+)\s*\(",
+    }.items()
+}
+
 
 class CodeChunker:
     """Chunk code files for embedding."""
@@ -27,11 +50,16 @@ class CodeChunker:
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # Lines this long (e.g. minified code) always fill a chunk on their own, so
+        # their tokens are estimated rather than counted exactly
+        self._long_line_chars = chunk_size * 8
         try:
             self.encoding = tiktoken.get_encoding("cl100k_base")
         except Exception:
             logger.warning("Failed to load tiktoken encoding, using fallback")
             self.encoding = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_failed = settings.chunk_workers == 1
 
     def chunk_file(
         self,
@@ -52,6 +80,27 @@ class CodeChunker:
         Returns:
             List of chunk dictionaries
         """
+        return list(self.iter_chunks(content, file_path, language, metadata))
+
+    def iter_chunks(
+        self,
+        content: str,
+        file_path: str,
+        language: str,
+        metadata: dict | None = None,
+    ) -> Iterator[dict]:
+        """
+        Chunk a code file lazily, yielding one chunk at a time.
+
+        Args:
+            content: File content
+            file_path: File path
+            language: Programming language
+            metadata: Additional metadata
+
+        Yields:
+            Chunk dictionaries
+        """
         if metadata is None:
             metadata = {}
 
@@ -61,13 +110,17 @@ class CodeChunker:
         else:
             chunks = self._chunk_by_tokens(content, file_path, language, metadata)
 
+        count = 0
+        for chunk in chunks:
+            count += 1
+            yield chunk
+
         logger.debug(
             "Chunked file",
             file_path=file_path,
             language=language,
-            chunks=len(chunks),
+            chunks=count,
         )
-        return chunks
 
     def _chunk_by_structure(
         self,
@@ -75,164 +128,199 @@ class CodeChunker:
         file_path: str,
         language: str,
         metadata: dict,
-    ) -> List[dict]:
+    ) -> Iterator[dict]:
         """Chunk code by functions/classes when possible."""
+        return self._chunk_lines(content, file_path, language, metadata)
+
+    def _chunk_by_tokens(
+        self,
+        content: str,
+        file_path: str,
+        language: str,
+        metadata: dict,
+    ) -> Iterator[dict]:
+        """Chunk content by token count."""
+        return self._chunk_lines(content, file_path, language, metadata)
+
+    def _chunk_lines(
+        self,
+        content: str,
+        file_path: str,
+        language: str,
+        metadata: dict,
+    ) -> Iterator[dict]:
+        """Split content into line-aligned chunks of about chunk_size tokens with overlap."""
         lines = content.split("\n")
-        chunks = []
-        current_chunk_lines = []
+        # Line lengths give both the character offsets and the fallback token estimate
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        token_counts = self._count_line_tokens(lines, lengths)
+        # prefix[k] is the token count of lines 0..k-1
+        prefix = list(accumulate(token_counts, initial=0))
+
+        # Character offset at which each line starts, so chunks are sliced out of content
+        offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+        np.cumsum(lengths + 1, out=offsets[1:])
+
+        chunk_index = 0
+        start = 0
         current_tokens = 0
-        current_start_line = 1
-
-        for i, line in enumerate(lines, start=1):
-            line_tokens = self._count_tokens(line)
 
+        for i, line_tokens in enumerate(token_counts):
             # Check if adding this line would exceed chunk size
-            if current_tokens + line_tokens > self.chunk_size and current_chunk_lines:
-                # Save current chunk
-                chunk_content = "\n".join(current_chunk_lines)
-                chunks.append(
-                    {
-                        "content": chunk_content,
-                        "file_path": file_path,
-                        "language": language,
-                        "start_line": current_start_line,
-                        "end_line": i - 1,
-                        "metadata": {
-                            **metadata,
-                            "chunk_index": len(chunks),
-                        },
-                    }
+            if current_tokens + line_tokens > self.chunk_size and i > start:
+                # Save current chunk (lines start..i-1)
+                yield self._make_chunk(
+                    content[offsets[start] : offsets[i] - 1],
+                    file_path,
+                    language,
+                    metadata,
+                    start_line=start + 1,
+                    end_line=i,
+                    chunk_index=chunk_index,
                 )
+                chunk_index += 1
 
                 # Start new chunk with overlap
-                overlap_lines = self._get_overlap_lines(
-                    current_chunk_lines, self.chunk_overlap
-                )
-                current_chunk_lines = overlap_lines + [line]
-                current_tokens = sum(self._count_tokens(l) for l in current_chunk_lines)
-                current_start_line = i - len(overlap_lines)
+                start = self._get_overlap_start(prefix, start, i, self.chunk_overlap)
+                current_tokens = prefix[i + 1] - prefix[start]
             else:
-                current_chunk_lines.append(line)
                 current_tokens += line_tokens
 
         # Add final chunk
-        if current_chunk_lines:
-            chunk_content = "\n".join(current_chunk_lines)
-            chunks.append(
-                {
-                    "content": chunk_content,
-                    "file_path": file_path,
-                    "language": language,
-                    "start_line": current_start_line,
-                    "end_line": len(lines),
-                    "metadata": {
-                        **metadata,
-                        "chunk_index": len(chunks),
-                    },
-                }
-            )
-
-        return chunks
+        yield self._make_chunk(
+            content[offsets[start] :],
+            file_path,
+            language,
+            metadata,
+            start_line=start + 1,
+            end_line=len(lines),
+            chunk_index=chunk_index,
+        )
 
-    def _chunk_by_tokens(
+    def _make_chunk(
         self,
         content: str,
         file_path: str,
         language: str,
         metadata: dict,
-    ) -> List[dict]:
-        """Chunk content by token count."""
-        lines = content.split("\n")
-        chunks = []
-        current_chunk_lines = []
-        current_tokens = 0
-        current_start_line = 1
-
-        for i, line in enumerate(lines, start=1):
-            line_tokens = self._count_tokens(line)
-
-            if current_tokens + line_tokens > self.chunk_size and current_chunk_lines:
-                chunk_content = "\n".join(current_chunk_lines)
-                chunks.append(
-                    {
-                        "content": chunk_content,
-                        "file_path": file_path,
-                        "language": language,
-                        "start_line": current_start_line,
-                        "end_line": i - 1,
-                        "metadata": {
-                            **metadata,
-                            "chunk_index": len(chunks),
-                        },
-                    }
-                )
-
-                # Overlap
-                overlap_lines = self._get_overlap_lines(
-                    current_chunk_lines, self.chunk_overlap
-                )
-                current_chunk_lines = overlap_lines + [line]
-                current_tokens = sum(self._count_tokens(l) for l in current_chunk_lines)
-                current_start_line = i - len(overlap_lines)
-            else:
-                current_chunk_lines.append(line)
-                current_tokens += line_tokens
+        start_line: int,
+        end_line: int,
+        chunk_index: int,
+    ) -> dict:
+        """Build a chunk dictionary."""
+        return {
+            "content": content,
+            "file_path": file_path,
+            "language": language,
+            "start_line": start_line,
+            "end_line": end_line,
+            "metadata": {
+                **metadata,
+                "chunk_index": chunk_index,
+            },
+        }
 
-        if current_chunk_lines:
-            chunk_content = "\n".join(current_chunk_lines)
-            chunks.append(
-                {
-                    "content": chunk_content,
-                    "file_path": file_path,
-                    "language": language,
-                    "start_line": current_start_line,
-                    "end_line": len(lines),
-                    "metadata": {
-                        **metadata,
-                        "chunk_index": len(chunks),
-                    },
-                }
-            )
-
-        return chunks
-
-    def _count_tokens(self, text: str) -> int:
-        """Count tokens in text."""
+    def _count_line_tokens(self, lines: List[str], lengths: np.ndarray) -> List[int]:
+        """Count tokens for every line in one batched tokenizer call."""
         if self.encoding:
-            return len(self.encoding.encode(text))
+            # Source files repeat lines heavily (blank lines, braces, imports), so
+            # only encode each distinct line once
+            unique_lines = list(dict.fromkeys(lines))
+            long_lines = [line for line in unique_lines if len(line) > self._long_line_chars]
+            if long_lines:
+                unique_lines = [line for line in unique_lines if len(line) <= self._long_line_chars]
+            counts = {
+                line: len(tokens)
+                for line, tokens in zip(
+                    unique_lines, self.encoding.encode_ordinary_batch(unique_lines)
+                )
+            }
+            for line in long_lines:
+                counts[line] = self._estimate_tokens(line)
+            return [counts[line] for line in lines]
         # Fallback: approximate 1 token = 4 characters
-        return len(text) // 4
+        return (lengths // 4).tolist()
 
-    def _get_overlap_lines(self, lines: List[str], overlap_tokens: int) -> List[str]:
-        """Get overlap lines from the end of current chunk."""
-        overlap_lines = []
-        tokens = 0
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Roughly estimate the tokens in text (code averages about 3 characters per token)."""
+        return len(text) // 3
 
-        for line in reversed(lines):
-            line_tokens = self._count_tokens(line)
-            if tokens + line_tokens > overlap_tokens:
-                break
-            overlap_lines.insert(0, line)
-            tokens += line_tokens
+    def _get_overlap_start(
+        self,
+        prefix: List[int],
+        start: int,
+        end: int,
+        overlap_tokens: int,
+    ) -> int:
+        """Get the first line of the longest suffix of lines start..end-1 within the overlap budget."""
+        return bisect_left(prefix, prefix[end] - overlap_tokens, start, end)
+
+    def get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        Get the process pool for chunking files in parallel, starting it on first use.
+
+        Returns:
+            Process pool running chunk_in_worker, or None if chunking must stay in-process
+        """
+        if self._pool is None and not self._pool_failed:
+            if multiprocessing.current_process().daemon:
+                # e.g. Celery prefork workers, which can't have children
+                logger.warning("Chunking in-process: daemonic processes can't start a pool")
+                self._pool_failed = True
+            else:
+                # Spawned rather than forked, so workers don't inherit the embedding
+                # model or the event loop
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.chunk_workers or None,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.chunk_size, self.chunk_overlap),
+                )
+                logger.info("Started chunking process pool")
+        return self._pool
 
-        return overlap_lines
+    def close(self) -> None:
+        """Shut down the chunking process pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
     def extract_function_name(self, content: str, language: str) -> str | None:
         """Extract function name from code chunk."""
-        patterns = {
-            "python": r"def\s+(\w+)\s*\(",
-            "javascript": r"function\s+(\w+)\s*\(",
-            "typescript": r"(?:function\s+)?(\w+)\s*[=:]\s*(?:\([^)]*\)\s*)?=>",
-            "java": r"(?:public|private|protected)?\s*\w+\s+(\w+)\s*\(",
-            "go": r"func\s+(\w+)\s*\(",
-            "rust": r"fn\s+(\w+)\s*\(",
-        }
-
-        pattern = patterns.get(language)
+        pattern = _FUNC_PATTERNS.get(language)
         if pattern:
-            match = re.search(pattern, content)
+            match = pattern.search(content)
             if match:
                 return match.group(1)
 
         return None
 
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    """Set up logging and the chunker in a pool worker process."""
+    global _worker_chunker
+
+    setup_logging(settings.log_level, settings.log_format)
+    _worker_chunker = CodeChunker(chunk_size, chunk_overlap)
+
+
+def chunk_in_worker(
+    content: str,
+    file_path: str,
+    language: str,
+    metadata: dict | None = None,
+) -> List[dict]:
+    """
+    Chunk a file inside a process pool worker (see CodeChunker.get_pool).
+
+    Args:
+        content: File content
+        file_path: File path
+        language: Programming language
+        metadata: Additional metadata
+
+    Returns:
+        List of chunk dictionaries
+    """
+    return _worker_chunker.chunk_file(content, file_path, language, metadata)
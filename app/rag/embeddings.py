@@ -1,14 +1,23 @@
 """Embedding generation for code chunks."""
 
-from typing import List
+import threading
+from typing import Any, Dict, List, Optional
 
+import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
+from app.core.config import get_settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
+settings = get_settings()
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+# Below this many texts, starting work on the process pool costs more than it saves
+MULTI_PROCESS_MIN_TEXTS = 256
+MULTI_PROCESS_CHUNK_SIZE = 512
 
 
 class EmbeddingGenerator:
@@ -21,27 +30,86 @@ class EmbeddingGenerator:
         Args:
             model_name: Name of the sentence transformer model
         """
-        logger.info("Loading embedding model", model=model_name)
-        self.model = SentenceTransformer(model_name)
+        self.model = self._load_model(model_name, settings.embedding_backend)
         self.model_name = model_name
+        self._pool: Optional[Dict[str, Any]] = None
+        self._pool_failed = not settings.embedding_multi_process
+        self._pool_lock = threading.Lock()
         logger.info("Embedding model loaded")
 
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @staticmethod
+    def _load_model(model_name: str, backend: str) -> SentenceTransformer:
+        """Load the model on the requested backend, falling back to PyTorch."""
+        logger.info("Loading embedding model", model=model_name, backend=backend)
+        if backend == "onnx":
+            try:
+                return SentenceTransformer(
+                    model_name,
+                    backend="onnx",
+                    model_kwargs={"file_name": settings.embedding_onnx_file},
+                )
+            except Exception as e:
+                logger.warning("Failed to load ONNX embedding model, using PyTorch", error=str(e))
+        model = SentenceTransformer(model_name)
+        if torch.cuda.is_available():
+            # Half precision halves memory traffic through the encoder on GPU;
+            # embeddings are returned as float32 regardless
+            model.half()
+        return model
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
 
+        Prefer this over generate_embedding when embedding many texts, since
+        the model runs far more efficiently on batches.
+
         Args:
             texts: List of text strings to embed
 
         Returns:
-            List of embedding vectors
+            Float32 array of unit-length embedding vectors, one row per text
         """
         if not texts:
-            return []
-
-        logger.debug("Generating embeddings", count=len(texts))
-        embeddings = self.model.encode(texts, show_progress_bar=False)
-        return embeddings.tolist()
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # Repositories repeat snippets (license headers, boilerplate, vendored code);
+        # embed each distinct text once and copy rows for the duplicates
+        unique_texts = list(dict.fromkeys(texts))
+        logger.debug("Generating embeddings", count=len(texts), unique=len(unique_texts))
+        if len(unique_texts) == len(texts):
+            return self._encode(texts)
+
+        row = {text: i for i, text in enumerate(unique_texts)}
+        return self._encode(unique_texts)[[row[text] for text in texts]]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into normalized embeddings, on the process pool for large inputs."""
+        if len(texts) > MULTI_PROCESS_MIN_TEXTS and self._get_pool() is not None:
+            # encode() length-sorts within each call, but the pool splits texts into
+            # chunks in input order; sorting first keeps each worker's batches
+            # similar in length so little compute goes to padding
+            order = np.argsort(np.fromiter(map(len, texts), dtype=np.int64), kind="stable")
+            with self._pool_lock:
+                sorted_embeddings = self.model.encode_multi_process(
+                    [texts[i] for i in order],
+                    self._pool,
+                    batch_size=EMBEDDING_BATCH_SIZE,
+                    chunk_size=MULTI_PROCESS_CHUNK_SIZE,
+                )
+            embeddings = np.empty_like(sorted_embeddings, dtype=np.float32)
+            embeddings[order] = sorted_embeddings
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings / np.maximum(norms, 1e-12)
+
+        embeddings = self.model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return embeddings.astype(np.float32, copy=False)
 
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -53,6 +121,31 @@ class EmbeddingGenerator:
         Returns:
             Embedding vector
         """
-        embedding = self.model.encode([text], show_progress_bar=False)
-        return embedding[0].tolist()
-
+        embedding = self.model.encode(
+            [text],
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return embedding[0].astype(np.float32, copy=False).tolist()
+
+    def _get_pool(self) -> Optional[Dict[str, Any]]:
+        """Start the multi-process encoding pool on first use."""
+        if self._pool is None and not self._pool_failed:
+            with self._pool_lock:
+                if self._pool is None and not self._pool_failed:
+                    try:
+                        self._pool = self.model.start_multi_process_pool()
+                        logger.info("Started embedding process pool")
+                    except Exception as e:
+                        # e.g. inside daemonic worker processes, which can't have children
+                        logger.warning("Embedding process pool unavailable", error=str(e))
+                        self._pool_failed = True
+        return self._pool
+
+    def close(self) -> None:
+        """Stop the multi-process encoding pool, if one was started."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self.model.stop_multi_process_pool(self._pool)
+                self._pool = None
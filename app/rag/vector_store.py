@@ -1,11 +1,14 @@
 """Qdrant vector store integration."""
 
+import functools
 import uuid
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple, Union
 
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client.models import Distance, VectorParams
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
@@ -13,6 +16,69 @@ from app.core.logging import get_logger
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Points per upsert request, and how many requests are in flight at once
+UPSERT_BATCH_SIZE = 512
+UPSERT_PARALLELISM = 4
+# Queries sent per batched search request
+SEARCH_BATCH_SIZE = 256
+
+# Namespace for deterministic point IDs
+_POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "codeguard:chunk")
+
+
+def _point_id(scan_id: str, chunk: dict) -> str:
+    """Derive a stable point ID so re-adding the same chunk overwrites it."""
+    key = f"{scan_id}|{chunk['file_path']}|{chunk['start_line']}|{chunk['end_line']}"
+    return str(uuid.uuid5(_POINT_ID_NAMESPACE, key))
+
+
+@functools.lru_cache(maxsize=256)
+def _build_filter(conditions: Tuple[Tuple[str, Any], ...]) -> models.Filter:
+    """Build (once per distinct set of conditions) a filter matching every key/value pair."""
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key=key,
+                match=models.MatchValue(value=value),
+            )
+            for key, value in conditions
+        ]
+    )
+
+
+def _filter_for(filter_dict: Optional[dict]) -> Optional[models.Filter]:
+    """Get the (cached) filter for a filter dictionary."""
+    if not filter_dict:
+        return None
+    return _build_filter(tuple(sorted(filter_dict.items())))
+
+
+# Payload fields returned at the top level of search results; the rest is metadata
+_RESERVED = frozenset({"content", "file_path", "language", "start_line", "end_line"})
+_RESERVED_PAYLOAD = models.PayloadSelectorInclude(include=sorted(_RESERVED))
+
+
+def _to_search_result(result: models.ScoredPoint, with_metadata: bool) -> dict:
+    """Convert a scored point into a search result dictionary."""
+    payload = result.payload
+    return {
+        "score": result.score,
+        "content": payload.get("content"),
+        "file_path": payload.get("file_path"),
+        "language": payload.get("language"),
+        "start_line": payload.get("start_line"),
+        "end_line": payload.get("end_line"),
+        "metadata": (
+            {k: v for k, v in payload.items() if k not in _RESERVED} if with_metadata else {}
+        ),
+    }
+
+
+# Search the quantized vectors, then rescore the top candidates with the originals
+SEARCH_PARAMS = models.SearchParams(
+    quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0),
+)
+
 
 class VectorStore:
     """Qdrant vector store for code embeddings."""
@@ -37,7 +103,19 @@ class VectorStore:
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
                     size=384,  # all-MiniLM-L6-v2 embedding size
-                    distance=Distance.COSINE,
+                    # EmbeddingGenerator returns unit-length vectors, so the dot
+                    # product equals cosine similarity without normalizing every
+                    # vector on the way in
+                    distance=Distance.DOT,
+                    on_disk=True,
+                ),
+                # Search runs on int8 copies kept in RAM (4x smaller); the float32
+                # originals stay on disk and are only read to rescore top candidates
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        always_ram=True,
+                    ),
                 ),
             )
             logger.info("Collection created", name=self.collection_name)
@@ -47,7 +125,7 @@ class VectorStore:
     def add_chunks(
         self,
         chunks: List[dict],
-        embeddings: List[List[float]],
+        embeddings: Union[np.ndarray, List[List[float]]],
         scan_id: str,
     ) -> None:
         """
@@ -55,89 +133,139 @@ class VectorStore:
 
         Args:
             chunks: List of chunk dictionaries
-            embeddings: List of embedding vectors
+            embeddings: Unit-length embedding vectors, as an array with one row per chunk or a list
             scan_id: Scan identifier
         """
         if len(chunks) != len(embeddings):
             raise ValueError("Chunks and embeddings must have same length")
 
-        points = []
-        for chunk, embedding in zip(chunks, embeddings):
-            point_id = str(uuid.uuid4())
-            points.append(
-                PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload={
-                        "content": chunk["content"],
-                        "file_path": chunk["file_path"],
-                        "language": chunk["language"],
-                        "start_line": chunk["start_line"],
-                        "end_line": chunk["end_line"],
-                        "scan_id": scan_id,
-                        **chunk.get("metadata", {}),
-                    },
-                )
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        # Send columnar batches (IDs, vectors, payloads) rather than one PointStruct per
+        # chunk: each vector is converted in C by tolist() instead of being validated
+        # float by float. Batches are built lazily and sent several at a time
+        batches = (
+            self._make_batch(
+                chunks[start : start + UPSERT_BATCH_SIZE],
+                vectors[start : start + UPSERT_BATCH_SIZE],
+                scan_id,
             )
+            for start in range(0, len(chunks), UPSERT_BATCH_SIZE)
+        )
+
+        logger.info("Adding points to vector store", count=len(chunks), scan_id=scan_id)
+        with ThreadPoolExecutor(max_workers=UPSERT_PARALLELISM) as pool:
+            # Consume results so a failed batch raises here
+            for _ in pool.map(self._upsert_batch, batches):
+                pass
+        logger.info("Points added to vector store", count=len(chunks))
 
-        logger.info("Adding points to vector store", count=len(points), scan_id=scan_id)
+    @staticmethod
+    def _make_batch(chunks: List[dict], vectors: np.ndarray, scan_id: str) -> models.Batch:
+        """Build one upsert batch of chunks and their embedding rows."""
+        return models.Batch(
+            ids=[_point_id(scan_id, chunk) for chunk in chunks],
+            vectors=vectors.tolist(),
+            payloads=[
+                {
+                    "content": chunk["content"],
+                    "file_path": chunk["file_path"],
+                    "language": chunk["language"],
+                    "start_line": chunk["start_line"],
+                    "end_line": chunk["end_line"],
+                    "scan_id": scan_id,
+                    **chunk.get("metadata", {}),
+                }
+                for chunk in chunks
+            ],
+        )
+
+    def _upsert_batch(self, batch: models.Batch) -> None:
+        """Upsert one batch of points."""
+        # Wait for the write to be applied: the scanner searches these points right after
         self.client.upsert(
             collection_name=self.collection_name,
-            points=points,
+            points=batch,
+            wait=True,
         )
-        logger.info("Points added to vector store", count=len(points))
 
     def search(
         self,
         query_embedding: List[float],
         limit: int = 10,
         filter_dict: Optional[dict] = None,
+        with_metadata: bool = True,
     ) -> List[dict]:
         """
         Search for similar code chunks.
 
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Unit-length query embedding vector
             limit: Maximum number of results
             filter_dict: Optional filter dictionary
+            with_metadata: Also fetch the remaining payload fields as metadata
 
         Returns:
             List of search results with scores
         """
-        query_filter = None
-        if filter_dict:
-            query_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key=key,
-                        match=models.MatchValue(value=value),
-                    )
-                    for key, value in filter_dict.items()
-                ]
-            )
-
         results = self.client.search(
             collection_name=self.collection_name,
             query_vector=query_embedding,
             limit=limit,
-            query_filter=query_filter,
+            query_filter=_filter_for(filter_dict),
+            search_params=SEARCH_PARAMS,
+            with_payload=True if with_metadata else _RESERVED_PAYLOAD,
         )
 
+        return [_to_search_result(result, with_metadata) for result in results]
+
+    def search_batch(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        limit: int = 10,
+        filter_dicts: Optional[List[Optional[dict]]] = None,
+        with_metadata: bool = True,
+    ) -> List[List[dict]]:
+        """
+        Search for chunks similar to each of several queries, in few round trips.
+
+        Args:
+            query_embeddings: Unit-length query embedding vectors, one row per query
+            limit: Maximum number of results per query
+            filter_dicts: Optional filter dictionary per query
+            with_metadata: Also fetch the remaining payload fields as metadata
+
+        Returns:
+            Search results for each query, in query order
+        """
+        if filter_dicts is None:
+            filter_dicts = [None] * len(query_embeddings)
+        if len(filter_dicts) != len(query_embeddings):
+            raise ValueError("Queries and filters must have same length")
+
+        with_payload = True if with_metadata else _RESERVED_PAYLOAD
+        requests = [
+            models.SearchRequest(
+                vector=list(map(float, query_embedding)),
+                filter=_filter_for(filter_dict),
+                limit=limit,
+                params=SEARCH_PARAMS,
+                with_payload=with_payload,
+            )
+            for query_embedding, filter_dict in zip(query_embeddings, filter_dicts)
+        ]
+
+        batches = []
+        for start in range(0, len(requests), SEARCH_BATCH_SIZE):
+            batches.extend(
+                self.client.search_batch(
+                    collection_name=self.collection_name,
+                    requests=requests[start : start + SEARCH_BATCH_SIZE],
+                )
+            )
+
         return [
-            {
-                "score": result.score,
-                "content": result.payload.get("content"),
-                "file_path": result.payload.get("file_path"),
-                "language": result.payload.get("language"),
-                "start_line": result.payload.get("start_line"),
-                "end_line": result.payload.get("end_line"),
-                "metadata": {
-                    k: v
-                    for k, v in result.payload.items()
-                    if k not in ["content", "file_path", "language", "start_line", "end_line"]
-                },
-            }
-            for result in results
+            [_to_search_result(result, with_metadata) for result in results]
+            for results in batches
         ]
 
     def delete_scan_data(self, scan_id: str) -> None:
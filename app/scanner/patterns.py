@@ -0,0 +1,83 @@
+"""Regex pre-filter for code patterns that commonly indicate vulnerabilities."""
+
+import re
+
+# Risky patterns by name, across the supported languages. A match doesn't mean the
+# code is vulnerable, only that it needs the LLM's review
+RISKY_PATTERNS = {
+    # Hardcoded secrets
+    "private_key": r"-----BEGIN (?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----",
+    "aws_access_key": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "github_token": r"\bgh[pousr]_[A-Za-z0-9]{36}\b",
+    "slack_token": r"\bxox[abprs]-[A-Za-z0-9-]{10,}",
+    "secret_assignment": (
+        r"(?i:password|passwd|pwd|secret|api_?key|access_?key|auth_?token|token)"
+        r"\w*\s*[:=]+\s*['\"][^'\"\s]{4,}['\"]"
+    ),
+    # Weak cryptography and randomness
+    "weak_hash": r"(?i:\bmd5\b|\bsha1\b)",
+    "weak_cipher": r"(?i:\bdes\b|\brc4\b|\bblowfish\b)|\bECB\b",
+    "insecure_random": r"\bMath\.random\s*\(|\brandom\.(?:random|randint|choice)\s*\(|\brand\s*\(",
+    # Code and command execution
+    "eval": r"\b(?:eval|exec)\s*\(|\bnew\s+Function\s*\(",
+    "shell_command": (
+        r"\bos\.(?:system|popen)\s*\(|shell\s*=\s*True|\bsubprocess\.\w+\s*\(|"
+        r"\bchild_process\b|\bRuntime\.getRuntime\(\)\.exec|\bexec\.Command\s*\(|"
+        r"\b(?:system|popen|passthru|shell_exec|proc_open)\s*\(|`[^`\n]*\$\{?\w"
+    ),
+    # Unsafe deserialization
+    "deserialization": (
+        r"\b(?:pickle|cPickle|marshal|shelve|dill)\.loads?\s*\(|\byaml\.load\s*\(|"
+        r"\bunserialize\s*\(|\bObjectInputStream\b|\bMarshal\.load\b|\bBinaryFormatter\b"
+    ),
+    # Injection
+    "sql_string_building": (
+        r"(?i:\b(?:select|insert|update|delete)\b)[^\n]*(?:['\"]\s*(?:\+|%|\.)|\{[^}\n]*\}|\$\{)|"
+        r"\.(?:execute|query|raw)\s*\(\s*f['\"]"
+    ),
+    "html_injection": (
+        r"\.innerHTML\s*=|\bdocument\.write\s*\(|dangerouslySetInnerHTML|"
+        r"\|\s*safe\b|\bmark_safe\s*\(|\bv-html\b"
+    ),
+    "path_from_input": r"\b(?:request|req|params|argv)\b[^\n]*\b(?:open|readFile|sendFile)\b",
+    # Memory safety
+    "unsafe_c_call": r"\b(?:gets|strcpy|strcat|sprintf|vsprintf|scanf)\s*\(",
+    "unsafe_block": r"\bunsafe\s*\{",
+    # Transport and configuration
+    "tls_verification_disabled": (
+        r"verify\s*=\s*False|InsecureSkipVerify\s*:\s*true|rejectUnauthorized\s*:\s*false|"
+        r"CURLOPT_SSL_VERIFYPEER\s*,\s*(?:0|false)|\bCERT_NONE\b"
+    ),
+    "plain_http_url": r"['\"]http://(?!localhost|127\.0\.0\.1|0\.0\.0\.0)[^'\"\s]+",
+    "debug_enabled": r"(?i:\bdebug\s*[:=]\s*(?:true|1)\b)",
+    "bind_all_interfaces": r"0\.0\.0\.0",
+    "open_cidr": r"0\.0\.0\.0/0|::/0",
+    "wildcard_permission": (
+        r"(?i:['\"]?(?:action|resource|principal)['\"]?\s*[:=]\s*\[?\s*['\"]\*['\"])|"
+        r"Access-Control-Allow-Origin['\"]?\s*[:,]\s*['\"]\*"
+    ),
+    "privileged_container": (
+        r"(?i:privileged\s*:\s*true)|allowPrivilegeEscalation\s*:\s*true|"
+        r"^\s*USER\s+root\b|--privileged"
+    ),
+    "world_writable": r"\bchmod\b[^\n]*\b[0-7]?777\b|0o?777\b",
+}
+
+# All patterns in one alternation, so each file is searched in a single pass
+_RISKY_REGEX = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in RISKY_PATTERNS.values()),
+    re.MULTILINE,
+)
+
+
+def has_risky_patterns(content: str) -> bool:
+    """
+    Check whether file content matches any risky code pattern.
+
+    Args:
+        content: File content
+
+    Returns:
+        True if at least one pattern matches
+    """
+    return _RISKY_REGEX.search(content) is not None
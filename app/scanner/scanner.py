@@ -1,56 +1,142 @@
 """Main scanner orchestrator."""
 
+import asyncio
+import time
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import numpy as np
+
+from app.core.config import get_settings
 from app.core.ingestion import CodeIngestion
 from app.core.llm import LLMEngine
 from app.models.schemas import Issue, IssueType, Location, ScanResult, ScanStatus, Severity
-from app.rag.chunker import CodeChunker
+from app.rag.chunker import CodeChunker, chunk_in_worker
 from app.rag.embeddings import EmbeddingGenerator
 from app.rag.vector_store import VectorStore
+from app.scanner.patterns import has_risky_patterns
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
+settings = get_settings()
+
+# Chunks are embedded and stored in batches of this size, bounding scan memory. Large
+# enough for the embedder to shard a batch across its process pool
+CHUNK_FLUSH_SIZE = 2048
+
+# Files in these languages averaging longer lines than this are minified bundles, not
+# reviewable code. Elsewhere a long line (e.g. compact JSON) is still real content
+MAX_AVERAGE_LINE_LENGTH = 500
+MINIFIED_LANGUAGES = frozenset({"javascript", "typescript"})
+
+# Files up to this size are packed with others of their language into shared LLM
+# requests, up to this much code per request
+PACK_MAX_FILE_CHARS = 3_000
+PACK_MAX_CHARS = 12_000
+
+# Scans with at least this many files are chunked on the chunker's process pool
+PARALLEL_CHUNK_MIN_FILES = 64
+
+# Files handed to the chunking pool at a time, bounding the chunks held in memory
+PARALLEL_CHUNK_WINDOW = 256
+
+# Severity members by value, so findings skip the Enum value lookup
+_SEV = {severity.value: severity for severity in Severity}
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching the database's timestamp columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 class CodeScanner:
     """Main code scanner orchestrator."""
 
-    def __init__(self) -> None:
-        """Initialize scanner components."""
-        self.ingestion = CodeIngestion()
-        self.chunker = CodeChunker()
-        self.embedder = EmbeddingGenerator()
-        self.vector_store = VectorStore()
-        self.llm = LLMEngine()
+    # Components are built on first use so importing or constructing the scanner stays
+    # cheap. scan() keeps all per-scan state in locals, so one instance can serve
+    # concurrent scans.
+
+    @cached_property
+    def ingestion(self) -> CodeIngestion:
+        """Code ingestion component."""
+        return CodeIngestion()
+
+    @cached_property
+    def chunker(self) -> CodeChunker:
+        """Code chunker component."""
+        return CodeChunker()
+
+    @cached_property
+    def embedder(self) -> EmbeddingGenerator:
+        """Embedding model component."""
+        return EmbeddingGenerator()
+
+    @cached_property
+    def vector_store(self) -> VectorStore:
+        """Vector store client."""
+        return VectorStore()
+
+    @cached_property
+    def llm(self) -> LLMEngine:
+        """LLM engine component."""
+        return LLMEngine()
+
+    def close(self) -> None:
+        """Release resources held by components that were started."""
+        if "chunker" in self.__dict__:
+            self.chunker.close()
+        if "embedder" in self.__dict__:
+            self.embedder.close()
+
+    async def aclose(self) -> None:
+        """Release all component resources, including the LLM clients' connections."""
+        await self.release_llm()
+        self.close()
+
+    async def release_llm(self) -> None:
+        """
+        Close the LLM engine and drop it, so the next scan builds a new one.
+
+        Its HTTP and Redis connections belong to the event loop they were opened on;
+        call this before that loop closes if the scanner will run on another one.
+        """
+        llm = self.__dict__.pop("llm", None)
+        if llm is not None:
+            await llm.aclose()
 
     async def scan(
         self,
+        scan_id: Optional[str] = None,
         repository_url: Optional[str] = None,
         repository_path: Optional[str] = None,
         branch: Optional[str] = None,
         file_paths: Optional[List[str]] = None,
         include_patterns: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
+        use_cache: bool = True,
     ) -> ScanResult:
         """
         Scan a repository for vulnerabilities and code issues.
 
         Args:
+            scan_id: Scan identifier (default: newly generated)
             repository_url: GitHub repository URL
             repository_path: Local repository path
             branch: Branch to scan
             file_paths: Specific file paths to scan
             include_patterns: File patterns to include
             exclude_patterns: File patterns to exclude
+            use_cache: Reuse cached analyses of files unchanged since an earlier scan
 
         Returns:
             ScanResult with all findings
         """
-        scan_id = str(uuid.uuid4())
-        started_at = datetime.utcnow()
+        scan_id = scan_id or str(uuid.uuid4())
+        started_at = _utcnow()
+        start_time = time.monotonic()
 
         logger.info("Starting scan", scan_id=scan_id, repository_url=repository_url)
 
@@ -66,85 +152,95 @@ class CodeScanner:
                 raise ValueError("Either repository_url or repository_path must be provided")
 
             # Step 2: Scan directory
-            files = await self.ingestion.scan_directory(
+            wanted_paths = set(file_paths) if file_paths else None
+            files = []
+            async for file_info in self.ingestion.scan_directory(
                 repo_path,
                 include_patterns=include_patterns,
                 exclude_patterns=exclude_patterns,
-            )
-
-            if file_paths:
-                files = [f for f in files if f["path"] in file_paths]
+            ):
+                if wanted_paths is not None and file_info["path"] not in wanted_paths:
+                    continue
+                files.append(file_info)
 
             total_files = len(files)
-            logger.info("Files to scan", count=total_files, scan_id=scan_id)
-
-            # Step 3: Chunk and embed files
-            all_chunks = []
-            all_embeddings = []
+            # Blank and minified files would only cost embedding and LLM calls
+            files = [file_info for file_info in files if self._is_analyzable(file_info)]
+            logger.info(
+                "Files to scan",
+                count=len(files),
+                skipped=total_files - len(files),
+                scan_id=scan_id,
+            )
 
-            for file_info in files:
-                chunks = self.chunker.chunk_file(
-                    file_info["content"],
-                    file_info["path"],
-                    file_info["language"],
-                    metadata={"file_size": file_info["size"], "lines": file_info["lines"]},
+            # Step 3: Chunk, embed and store files, a bounded batch of chunks at a time.
+            # Each batch is stored on a worker thread while the next one is chunked;
+            # only one is in flight, so memory stays bounded
+            buffer: List[dict] = []
+            file_vectors: Dict[str, np.ndarray] = {}
+            store_task: Optional[asyncio.Task] = None
+            async for file_chunks in self._iter_file_chunks(files):
+                for chunk in file_chunks:
+                    buffer.append(chunk)
+                    if len(buffer) >= CHUNK_FLUSH_SIZE:
+                        if store_task is not None:
+                            await store_task
+                        store_task = asyncio.create_task(
+                            asyncio.to_thread(self._store_chunks, buffer, scan_id, file_vectors)
+                        )
+                        buffer = []
+            if store_task is not None:
+                await store_task
+            if buffer:
+                await asyncio.to_thread(self._store_chunks, buffer, scan_id, file_vectors)
+
+            # Small files without any risky pattern are only stored as context for
+            # others; they'd cost a whole LLM call for little to find
+            analyzed = [file_info for file_info in files if self._needs_llm(file_info)]
+            prefiltered = len(files) - len(analyzed)
+            if prefiltered:
+                logger.info(
+                    "Skipping LLM for clean small files", count=prefiltered, scan_id=scan_id
                 )
-                all_chunks.extend(chunks)
-
-            # Generate embeddings
-            chunk_texts = [chunk["content"] for chunk in all_chunks]
-            embeddings = self.embedder.generate_embeddings(chunk_texts)
-
-            # Step 4: Store in vector database
-            self.vector_store.add_chunks(all_chunks, embeddings, scan_id)
+            files = analyzed
+
+            # Step 4: Retrieve related context for every file with batched vector
+            # searches, then analyze the files concurrently. A file's query vector is
+            # the mean of its chunk embeddings, so files aren't encoded a second time
+            # (and long files aren't cut off at the model's input limit)
+            file_embeddings = [
+                self._unit_vector(file_vectors[file_info["path"]]) for file_info in files
+            ]
+            contexts = await asyncio.to_thread(
+                self.vector_store.search_batch,
+                file_embeddings,
+                limit=3,
+                filter_dicts=[{"language": file_info["language"]} for file_info in files],
+                # The prompt only uses content, path, language and lines
+                with_metadata=False,
+            )
+            semaphore = asyncio.Semaphore(settings.llm_concurrency)
+            results = await asyncio.gather(
+                *(
+                    self._analyze_group(group, semaphore, scan_id, use_cache)
+                    for group in self._group_files(list(zip(files, contexts)))
+                )
+            )
 
-            # Step 5: Analyze each file/chunk
             all_issues = []
+            # Only files the LLM actually analyzed count as scanned
             scanned_files = 0
+            for group_results in results:
+                for issues in group_results:
+                    if issues is not None:
+                        all_issues.extend(issues)
+                        scanned_files += 1
 
-            for file_info in files:
-                try:
-                    # Get relevant context from vector store
-                    file_embedding = self.embedder.generate_embedding(file_info["content"])
-                    context = self.vector_store.search(
-                        file_embedding,
-                        limit=3,
-                        filter_dict={"language": file_info["language"]},
-                    )
-
-                    # Analyze with LLM
-                    analysis = await self.llm.analyze_code(
-                        file_info["content"],
-                        file_info["language"],
-                        file_info["path"],
-                        context=context,
-                    )
-
-                    # Convert analysis to issues
-                    issues = self._convert_analysis_to_issues(
-                        analysis, file_info["path"], file_info["language"]
-                    )
-                    all_issues.extend(issues)
-                    scanned_files += 1
-
-                    logger.debug(
-                        "File analyzed",
-                        file_path=file_info["path"],
-                        issues=len(issues),
-                        scan_id=scan_id,
-                    )
-                except Exception as e:
-                    logger.error(
-                        "Failed to analyze file",
-                        file_path=file_info["path"],
-                        error=str(e),
-                        scan_id=scan_id,
-                    )
-
-            completed_at = datetime.utcnow()
+            completed_at = _utcnow()
 
             # Calculate summary
             summary = self._calculate_summary(all_issues)
+            summary["prefiltered_files"] = prefiltered
 
             result = ScanResult(
                 scan_id=scan_id,
@@ -163,7 +259,7 @@ class CodeScanner:
                 "Scan completed",
                 scan_id=scan_id,
                 issues=len(all_issues),
-                duration=(completed_at - started_at).total_seconds(),
+                duration=time.monotonic() - start_time,
             )
 
             # Cleanup
@@ -180,33 +276,285 @@ class CodeScanner:
                 repository_url=repository_url,
                 repository_path=repository_path,
                 started_at=started_at,
-                completed_at=datetime.utcnow(),
+                completed_at=_utcnow(),
                 total_files=0,
                 scanned_files=0,
                 issues=[],
                 summary={"error": str(e)},
             )
 
+    @staticmethod
+    def _unit_vector(vector: np.ndarray) -> np.ndarray:
+        """Scale a summed embedding back to unit length."""
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    @staticmethod
+    def _is_analyzable(file_info: dict) -> bool:
+        """Check whether a file has reviewable code worth embedding and analyzing."""
+        if not file_info["content"].strip():
+            logger.debug("Skipping blank file", file_path=file_info["path"])
+            return False
+        if (
+            file_info["language"] in MINIFIED_LANGUAGES
+            and file_info["size"] > file_info["lines"] * MAX_AVERAGE_LINE_LENGTH
+        ):
+            logger.debug("Skipping minified file", file_path=file_info["path"])
+            return False
+        return True
+
+    @staticmethod
+    def _needs_llm(file_info: dict) -> bool:
+        """Check whether a file needs LLM analysis, or is small and matches no risky pattern."""
+        if file_info["size"] > settings.llm_skip_clean_max_bytes:
+            return True
+        return has_risky_patterns(file_info["content"])
+
+    async def _iter_file_chunks(self, files: List[dict]) -> AsyncIterator[List[dict]]:
+        """Chunk files in order, on the chunker's process pool when there are many."""
+        pool = self.chunker.get_pool() if len(files) >= PARALLEL_CHUNK_MIN_FILES else None
+        if pool is None:
+            for file_info in files:
+                yield self.chunker.chunk_file(*self._chunk_args(file_info))
+            return
+
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(files), PARALLEL_CHUNK_WINDOW):
+            window = files[start : start + PARALLEL_CHUNK_WINDOW]
+            for file_chunks in await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, chunk_in_worker, *self._chunk_args(file_info))
+                    for file_info in window
+                )
+            ):
+                yield file_chunks
+
+    @staticmethod
+    def _chunk_args(file_info: dict) -> tuple:
+        """Chunker arguments for a scanned file."""
+        return (
+            file_info["content"],
+            file_info["path"],
+            file_info["language"],
+            {"file_size": file_info["size"], "lines": file_info["lines"]},
+        )
+
+    def _store_chunks(
+        self, chunks: List[dict], scan_id: str, file_vectors: Dict[str, np.ndarray]
+    ) -> None:
+        """
+        Embed a batch of chunks and add them to the vector store.
+
+        Args:
+            chunks: Chunk dictionaries from the chunker
+            scan_id: Scan identifier
+            file_vectors: Running sum of chunk embeddings per file path, updated in place
+        """
+        embeddings = self.embedder.generate_embeddings([chunk["content"] for chunk in chunks])
+        self.vector_store.add_chunks(chunks, embeddings, scan_id)
+        for chunk, embedding in zip(chunks, embeddings):
+            total = file_vectors.get(chunk["file_path"])
+            if total is None:
+                file_vectors[chunk["file_path"]] = embedding.copy()
+            else:
+                total += embedding
+
+    @staticmethod
+    def _group_files(
+        items: List[Tuple[dict, List[dict]]],
+    ) -> List[List[Tuple[dict, List[dict]]]]:
+        """
+        Group files with their context into LLM requests.
+
+        Small files of one language are packed together, smallest first, so the
+        prompt's fixed instructions are sent once per pack; other files get a
+        request each.
+
+        Args:
+            items: Files from ingestion paired with their retrieved context
+
+        Returns:
+            Groups of items, each analyzed in one LLM request
+        """
+        groups: List[List[Tuple[dict, List[dict]]]] = []
+        small: Dict[str, List[Tuple[dict, List[dict]]]] = {}
+        for item in items:
+            file_info = item[0]
+            if settings.llm_pack_max_files > 1 and len(file_info["content"]) <= PACK_MAX_FILE_CHARS:
+                small.setdefault(file_info["language"], []).append(item)
+            else:
+                groups.append([item])
+
+        for language_items in small.values():
+            language_items.sort(key=lambda item: len(item[0]["content"]))
+            pack: List[Tuple[dict, List[dict]]] = []
+            pack_chars = 0
+            for item in language_items:
+                size = len(item[0]["content"])
+                if pack and (
+                    len(pack) >= settings.llm_pack_max_files or pack_chars + size > PACK_MAX_CHARS
+                ):
+                    groups.append(pack)
+                    pack = []
+                    pack_chars = 0
+                pack.append(item)
+                pack_chars += size
+            if pack:
+                groups.append(pack)
+
+        return groups
+
+    async def _analyze_group(
+        self,
+        group: List[Tuple[dict, List[dict]]],
+        semaphore: asyncio.Semaphore,
+        scan_id: str,
+        use_cache: bool = True,
+    ) -> List[Optional[List[Issue]]]:
+        """
+        Analyze a group of files from _group_files in one LLM request.
+
+        Files the packed request doesn't cover are analyzed on their own.
+
+        Args:
+            group: Files from ingestion paired with their retrieved context
+            semaphore: Bounds how many LLM requests run at once
+            scan_id: Scan identifier (for logging)
+            use_cache: Reuse cached analyses of identical content
+
+        Returns:
+            Issues found in each file, or None for files whose analysis failed
+        """
+        if len(group) == 1:
+            file_info, context = group[0]
+            return [await self._analyze_one(file_info, context, semaphore, scan_id, use_cache)]
+
+        async with semaphore:
+            try:
+                analyses = await self.llm.analyze_files(
+                    [
+                        {"path": file_info["path"], "code": file_info["content"]}
+                        for file_info, _ in group
+                    ],
+                    language=group[0][0]["language"],
+                    contexts=[context for _, context in group],
+                    use_cache=use_cache,
+                )
+            except Exception as e:
+                logger.warning(
+                    "Packed analysis failed", files=len(group), error=str(e), scan_id=scan_id
+                )
+                analyses = {}
+
+        results: List[Optional[List[Issue]]] = []
+        unanalyzed: List[Tuple[dict, List[dict]]] = []
+        for file_info, context in group:
+            analysis = analyses.get(file_info["path"])
+            if analysis is None:
+                unanalyzed.append((file_info, context))
+                continue
+            try:
+                issues = self._convert_analysis_to_issues(
+                    analysis, file_info["path"], file_info["language"]
+                )
+            except Exception as e:
+                logger.error(
+                    "Failed to analyze file",
+                    file_path=file_info["path"],
+                    error=str(e),
+                    scan_id=scan_id,
+                )
+                issues = None
+            results.append(issues)
+
+        if unanalyzed:
+            logger.debug(
+                "Analyzing files missing from packed analysis",
+                files=len(unanalyzed),
+                scan_id=scan_id,
+            )
+            results.extend(
+                await asyncio.gather(
+                    *(
+                        self._analyze_one(file_info, context, semaphore, scan_id, use_cache)
+                        for file_info, context in unanalyzed
+                    )
+                )
+            )
+        return results
+
+    async def _analyze_one(
+        self,
+        file_info: dict,
+        context: List[dict],
+        semaphore: asyncio.Semaphore,
+        scan_id: str,
+        use_cache: bool = True,
+    ) -> Optional[List[Issue]]:
+        """
+        Analyze a file with the LLM and convert the findings.
+
+        Args:
+            file_info: File dictionary from ingestion
+            context: Related chunks from the vector store
+            semaphore: Bounds how many files are analyzed at once
+            scan_id: Scan identifier (for logging)
+            use_cache: Reuse a cached analysis of identical content
+
+        Returns:
+            Issues found in the file, or None if the analysis failed
+        """
+        async with semaphore:
+            try:
+                analysis = await self.llm.analyze_code(
+                    code=file_info["content"],
+                    language=file_info["language"],
+                    file_path=file_info["path"],
+                    context=context,
+                    use_cache=use_cache,
+                )
+
+                # Convert analysis to issues
+                issues = self._convert_analysis_to_issues(
+                    analysis, file_info["path"], file_info["language"]
+                )
+            except Exception as e:
+                logger.error(
+                    "Failed to analyze file",
+                    file_path=file_info["path"],
+                    error=str(e),
+                    scan_id=scan_id,
+                )
+                return None
+
+        logger.debug(
+            "File analyzed",
+            file_path=file_info["path"],
+            issues=len(issues),
+            scan_id=scan_id,
+        )
+        return issues
+
     def _convert_analysis_to_issues(
         self, analysis: dict, file_path: str, language: str
     ) -> List[Issue]:
         """Convert LLM analysis to Issue objects."""
+        # Issue fields come straight from model output and stay validated; only the
+        # Location, whose fields are known here, is built without validation
         issues = []
 
         # Process vulnerabilities
         for vuln in analysis.get("vulnerabilities", []):
             issues.append(
                 Issue(
-                    id=str(uuid.uuid4()),
+                    id=uuid.uuid4().hex,
                     type=IssueType.VULNERABILITY,
-                    severity=Severity(vuln.get("severity", "medium").lower()),
+                    severity=_SEV[vuln.get("severity", "medium").lower()],
                     title=vuln.get("title", "Security vulnerability"),
                     description=vuln.get("description", ""),
-                    location=Location(
-                        file_path=file_path,
-                        start_line=vuln.get("start_line", 1),
-                        end_line=vuln.get("end_line", vuln.get("start_line", 1)),
-                        function_name=None,
+                    location=self._make_location(
+                        file_path,
+                        vuln.get("start_line", 1),
+                        vuln.get("end_line", vuln.get("start_line", 1)),
                     ),
                     rule_id=vuln.get("rule_id"),
                     cwe_id=vuln.get("cwe_id"),
@@ -221,15 +569,15 @@ class CodeScanner:
         for review in analysis.get("code_review", []):
             issues.append(
                 Issue(
-                    id=str(uuid.uuid4()),
+                    id=uuid.uuid4().hex,
                     type=IssueType.CODE_REVIEW,
-                    severity=Severity(review.get("severity", "info").lower()),
+                    severity=_SEV[review.get("severity", "info").lower()],
                     title=review.get("title", "Code review finding"),
                     description=review.get("description", ""),
-                    location=Location(
-                        file_path=file_path,
-                        start_line=review.get("start_line", 1),
-                        end_line=review.get("end_line", review.get("start_line", 1)),
+                    location=self._make_location(
+                        file_path,
+                        review.get("start_line", 1),
+                        review.get("end_line", review.get("start_line", 1)),
                     ),
                     suggestion=review.get("suggestion"),
                     code_snippet=review.get("code_snippet"),
@@ -241,21 +589,31 @@ class CodeScanner:
         for comment in analysis.get("auto_comments", []):
             issues.append(
                 Issue(
-                    id=str(uuid.uuid4()),
+                    id=uuid.uuid4().hex,
                     type=IssueType.AUTO_COMMENT,
                     severity=Severity.INFO,
                     title="Suggested comment",
                     description=comment.get("comment", ""),
-                    location=Location(
-                        file_path=file_path,
-                        start_line=comment.get("line", 1),
-                        end_line=comment.get("line", 1),
+                    location=self._make_location(
+                        file_path, comment.get("line", 1), comment.get("line", 1)
                     ),
                 )
             )
 
         return issues
 
+    @staticmethod
+    def _make_location(file_path: str, start_line: int, end_line: int) -> Location:
+        """Build an issue location without validation, coercing the LLM's line numbers."""
+        return Location.model_construct(
+            file_path=file_path,
+            start_line=int(start_line),
+            end_line=int(end_line),
+            start_column=None,
+            end_column=None,
+            function_name=None,
+        )
+
     def _calculate_summary(self, issues: List[Issue]) -> dict:
         """Calculate summary statistics."""
         summary = {
@@ -274,13 +632,8 @@ class CodeScanner:
             },
         }
 
-        for issue in issues:
-            summary["by_severity"][issue.severity.value] = (
-                summary["by_severity"].get(issue.severity.value, 0) + 1
-            )
-            summary["by_type"][issue.type.value] = (
-                summary["by_type"].get(issue.type.value, 0) + 1
-            )
+        summary["by_severity"].update(Counter(issue.severity.value for issue in issues))
+        summary["by_type"].update(Counter(issue.type.value for issue in issues))
 
         return summary
 
@@ -0,0 +1,101 @@
+"""Celery tasks for running scans outside the API process.
+
+Start a worker with:
+
+    celery -A app.tasks worker --concurrency=N
+"""
+
+import asyncio
+from typing import Any, Dict
+
+from celery import Celery, signals
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+from app.models import crud
+from app.models.schemas import ScanStatus
+from app.scanner.scanner import CodeScanner
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+celery_app = Celery("codeguard", broker=settings.redis_url)
+celery_app.conf.update(
+    # Results are written to Postgres, so Celery doesn't need a result backend
+    task_ignore_result=True,
+    # Scans are long-running; take one at a time and acknowledge only once finished
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+)
+
+scanner = CodeScanner()
+
+
+@signals.setup_logging.connect
+def configure_worker_logging(**kwargs: Any) -> None:
+    """Use the application's structured logging in Celery workers."""
+    setup_logging(settings.log_level, settings.log_format)
+
+
+@signals.worker_process_shutdown.connect
+def close_scanner(**kwargs: Any) -> None:
+    """Release scanner resources when a worker process exits."""
+    # LLM clients are closed at the end of every task (see _run_scan), so only the
+    # chunking and embedding pools are left to release
+    scanner.close()
+
+
+@signals.worker_process_shutdown.connect
+def flush_worker_logging(**kwargs: Any) -> None:
+    """Write out queued log records before a worker process exits."""
+    shutdown_logging()
+
+
+@celery_app.task(name="codeguard.run_scan")
+def run_scan_task(scan_id: str, request: Dict[str, Any], cleanup: bool = False) -> None:
+    """
+    Run a scan and persist its result.
+
+    Args:
+        scan_id: Identifier of the pending scan record
+        request: ScanRequest fields as a JSON-compatible dictionary
+        cleanup: Remove repository_path once the scan finishes (for uploads)
+    """
+    asyncio.run(_run_scan(scan_id, request, cleanup))
+
+
+async def _run_scan(scan_id: str, request: Dict[str, Any], cleanup: bool) -> None:
+    """Run a scan inside a fresh event loop."""
+    logger.info("Running scan task", scan_id=scan_id)
+    try:
+        async with AsyncSessionLocal() as session:
+            await crud.update_scan_status(session, scan_id, ScanStatus.IN_PROGRESS)
+
+        result = await scanner.scan(scan_id=scan_id, **request)
+
+        async with AsyncSessionLocal() as session:
+            await crud.save_scan_result(session, result)
+        logger.info("Scan task finished", scan_id=scan_id, status=result.status.value)
+    except Exception as e:
+        logger.error("Scan task failed", scan_id=scan_id, error=str(e))
+        await _mark_failed(scan_id, str(e))
+        raise
+    finally:
+        if cleanup and request.get("repository_path"):
+            scanner.ingestion.cleanup(request["repository_path"])
+        # Pooled connections are bound to this task's event loop and can't be reused.
+        # The LLM engine is rebuilt by the next task (its in-memory analysis cache goes
+        # with it; use the redis cache backend to share results across tasks)
+        await scanner.release_llm()
+        await engine.dispose()
+
+
+async def _mark_failed(scan_id: str, error: str) -> None:
+    """Record a scan as failed, so its row isn't left in progress."""
+    # A fresh session, since the failing one may be unusable (e.g. after an IntegrityError)
+    try:
+        async with AsyncSessionLocal() as session:
+            await crud.update_scan_status(session, scan_id, ScanStatus.FAILED, error=error)
+    except Exception as e:
+        logger.error("Failed to mark scan as failed", scan_id=scan_id, error=str(e))
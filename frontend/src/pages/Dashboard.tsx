@@ -7,7 +7,7 @@ import { AlertCircle, CheckCircle, Clock, XCircle } from 'lucide-react'
 export default function Dashboard() {
   const { data: scans, isLoading } = useQuery<ScanResponse[]>(
     'scans',
-    () => api.getScans(),
+    async () => (await api.getScans()).scans,
     { refetchInterval: 5000 }
   )
 
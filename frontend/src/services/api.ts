@@ -1,5 +1,5 @@
 import axios from 'axios'
-import { ScanRequest, ScanResponse, ScanResult } from '../types'
+import { ScanListResponse, ScanRequest, ScanResponse, ScanResult } from '../types'
 
 const apiClient = axios.create({
   baseURL: '/api/v1',
@@ -19,8 +19,10 @@ export const api = {
     return response.data
   },
 
-  async getScans(): Promise<ScanResponse[]> {
-    const response = await apiClient.get<ScanResponse[]>('/scans')
+  async getScans(cursor?: string): Promise<ScanListResponse> {
+    const response = await apiClient.get<ScanListResponse>('/scans', {
+      params: cursor ? { cursor } : undefined,
+    })
     return response.data
   },
 }
@@ -52,6 +52,11 @@ export interface ScanResponse {
   error?: string
 }
 
+export interface ScanListResponse {
+  scans: ScanResponse[]
+  next_cursor?: string
+}
+
 export interface ScanResult {
   scan_id: string
   status: 'pending' | 'in_progress' | 'completed' | 'failed'
@@ -0,0 +1,131 @@
+"""Unit tests for scan persistence."""
+
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlmodel import SQLModel
+
+from app.api.dependencies import get_db
+from app.api.routes import router
+from app.models import crud
+from app.models.schemas import Issue, IssueType, Location, ScanResult, ScanStatus, Severity
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(type_, compiler, **kwargs):
+    return "JSON"
+
+
+@pytest.fixture
+async def session():
+    """Session on a fresh in-memory SQLite database."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def make_issue(issue_id: str, severity: Severity) -> Issue:
+    """Build a minimal issue."""
+    return Issue(
+        id=issue_id,
+        type=IssueType.VULNERABILITY,
+        severity=severity,
+        title="Issue",
+        description="Description",
+        location=Location(file_path="app.py", start_line=1, end_line=1),
+    )
+
+
+def make_result(scan_id: str, issues=(), summary=None, started_at=None) -> ScanResult:
+    """Build a completed scan result."""
+    return ScanResult(
+        scan_id=scan_id,
+        status=ScanStatus.COMPLETED,
+        repository_path="/tmp/repo",
+        started_at=started_at or datetime(2024, 1, 1),
+        total_files=1,
+        scanned_files=1,
+        issues=list(issues),
+        summary=summary or {},
+    )
+
+
+async def test_save_scan_result_counts_issues_by_severity(session):
+    """Test that the severity histogram is counted from the stored issues."""
+    issues = [
+        make_issue("a", Severity.HIGH),
+        make_issue("b", Severity.HIGH),
+        make_issue("c", Severity.LOW),
+    ]
+    # A stale in-memory summary must not be trusted
+    result = make_result("s1", issues, summary={"by_severity": {"high": 1}})
+    await crud.save_scan_result(session, result)
+
+    counts = await crud.count_issues_by_severity(session, "s1")
+    assert counts == {"critical": 0, "high": 2, "medium": 0, "low": 1, "info": 0}
+
+    scans, _ = await crud.list_scans(session, limit=10)
+    assert scans[0].issues_by_severity == counts
+    assert scans[0].total_issues == 3
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the sort key it was built from."""
+    started_at = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    cursor = crud.encode_cursor(started_at, "scan|with|pipes")
+    assert crud.decode_cursor(cursor) == (started_at, "scan|with|pipes")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bm8tc2VwYXJhdG9y", "Zm9vfGJhcg=="])
+def test_decode_cursor_rejects_malformed(cursor):
+    """Test that malformed cursors raise ValueError."""
+    with pytest.raises(ValueError):
+        crud.decode_cursor(cursor)
+
+
+async def test_list_scans_breaks_ties_by_id(session):
+    """Test paging through scans that share a start time."""
+    started_at = datetime(2024, 1, 1)
+    for scan_id in ["a", "b", "c"]:
+        await crud.save_scan_result(session, make_result(scan_id, started_at=started_at))
+    await crud.save_scan_result(session, make_result("z", started_at=datetime(2023, 1, 1)))
+
+    first, cursor = await crud.list_scans(session, limit=2)
+    assert [scan.id for scan in first] == ["c", "b"]
+    assert cursor is not None
+
+    second, cursor = await crud.list_scans(session, limit=2, cursor=cursor)
+    assert [scan.id for scan in second] == ["a", "z"]
+    assert cursor is None
+
+
+async def test_list_scans_last_page_has_no_cursor(session):
+    """Test that a page holding the remaining scans has no next cursor."""
+    await crud.save_scan_result(session, make_result("only"))
+
+    scans, cursor = await crud.list_scans(session, limit=1)
+    assert [scan.id for scan in scans] == ["only"]
+    assert cursor is None
+
+
+async def test_list_scans_route_rejects_malformed_cursor(session):
+    """Test that the scan list endpoint answers a bad cursor with 400."""
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/scans", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+        response = await client.get("/scans")
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
@@ -0,0 +1,36 @@
+"""Unit tests for skipping files that aren't worth analyzing."""
+
+import pytest
+
+from app.scanner.scanner import CodeScanner
+
+
+def make_file(content: str, language: str) -> dict:
+    """Build a scanned file as ingestion yields it."""
+    return {
+        "path": f"file.{language}",
+        "content": content,
+        "language": language,
+        "size": len(content),
+        "lines": content.count("\n") + 1,
+    }
+
+
+LONG_LINE = "a" * 2000
+
+
+@pytest.mark.parametrize(
+    "content, language, expected",
+    [
+        ("print('hello')\n", "python", True),
+        ("  \n\n", "python", False),
+        (LONG_LINE, "javascript", False),
+        (LONG_LINE, "typescript", False),
+        # Only JS/TS bundles are minified; long lines elsewhere are real content
+        (LONG_LINE, "json", True),
+        (LONG_LINE, "python", True),
+    ],
+)
+def test_is_analyzable(content, language, expected):
+    """Test that blank files and minified bundles are skipped."""
+    assert CodeScanner._is_analyzable(make_file(content, language)) is expected
@@ -0,0 +1,44 @@
+"""Unit tests for structured logging."""
+
+import logging
+import os
+
+import pytest
+
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    """Stop the background writer and restore the root logger after a test."""
+    root_logger = logging.getLogger()
+    handlers, level = root_logger.handlers, root_logger.level
+    yield
+    shutdown_logging()
+    root_logger.handlers, root_logger.level = handlers, level
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_child_logs_are_written(restore_root_logger, capfd):
+    """Test that a forked worker process gets its own running log writer."""
+    setup_logging("INFO", "json")
+    logger = get_logger("tests.logging")
+    logger.info("from parent")
+
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            logger.info("from child")
+            shutdown_logging()
+        except BaseException:
+            status = 1
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    shutdown_logging()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    out = capfd.readouterr().out
+    assert "from parent" in out
+    assert "from child" in out
@@ -0,0 +1,158 @@
+"""Unit tests for packing small files into shared LLM requests."""
+
+import asyncio
+
+import pytest
+
+from app.core.llm import PACKED_CONTEXT_CHUNKS_PER_FILE, LLMEngine
+from app.scanner import scanner as scanner_module
+from app.scanner.scanner import PACK_MAX_CHARS, PACK_MAX_FILE_CHARS, CodeScanner
+
+FINDING = {
+    "vulnerabilities": [{"severity": "high", "title": "Injection", "start_line": 1}],
+    "code_review": [],
+    "auto_comments": [],
+}
+
+
+def make_item(path: str, size: int, language: str = "python"):
+    """Build a scanned file of the given size paired with empty context."""
+    content = "x" * size
+    return ({"path": path, "content": content, "language": language}, [])
+
+
+def group_paths(groups):
+    """File paths of each group."""
+    return [[file_info["path"] for file_info, _ in group] for group in groups]
+
+
+@pytest.fixture
+def pack_max_files(monkeypatch):
+    """Allow three files per pack."""
+    monkeypatch.setattr(scanner_module.settings, "llm_pack_max_files", 3)
+    return 3
+
+
+def test_small_files_are_packed_per_language(pack_max_files):
+    """Test that only small files of the same language share a request."""
+    items = [
+        make_item("a.py", 10),
+        make_item("b.js", 10, language="javascript"),
+        make_item("c.py", 20),
+        make_item("big.py", PACK_MAX_FILE_CHARS + 1),
+    ]
+
+    groups = group_paths(CodeScanner._group_files(items))
+
+    assert ["big.py"] in groups
+    assert ["a.py", "c.py"] in groups
+    assert ["b.js"] in groups
+    assert len(groups) == 3
+
+
+def test_file_at_size_cutoff_is_packed(pack_max_files):
+    """Test that a file exactly at the small-file cutoff is still packed."""
+    items = [make_item("a.py", PACK_MAX_FILE_CHARS), make_item("b.py", 1)]
+    assert group_paths(CodeScanner._group_files(items)) == [["b.py", "a.py"]]
+
+
+def test_packs_respect_file_limit(pack_max_files):
+    """Test that a pack holds at most llm_pack_max_files files."""
+    items = [make_item(f"f{i}.py", 10) for i in range(7)]
+
+    groups = CodeScanner._group_files(items)
+
+    assert [len(group) for group in groups] == [3, 3, 1]
+
+
+def test_packs_respect_character_budget(monkeypatch):
+    """Test that a pack's code stays within the character budget."""
+    monkeypatch.setattr(scanner_module.settings, "llm_pack_max_files", 100)
+    size = PACK_MAX_FILE_CHARS
+    per_pack = PACK_MAX_CHARS // size
+    items = [make_item(f"f{i}.py", size) for i in range(per_pack + 1)]
+
+    groups = CodeScanner._group_files(items)
+
+    assert [len(group) for group in groups] == [per_pack, 1]
+
+
+def test_packing_disabled(monkeypatch):
+    """Test that llm_pack_max_files=1 gives every file its own request."""
+    monkeypatch.setattr(scanner_module.settings, "llm_pack_max_files", 1)
+    items = [make_item("a.py", 10), make_item("b.py", 10)]
+    assert group_paths(CodeScanner._group_files(items)) == [["a.py"], ["b.py"]]
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    """Scanner whose LLM answers packed prompts with packed_answer."""
+    llm = LLMEngine()
+    llm.single_calls = []
+    llm.packed_answer = None
+
+    async def generate(prompt, max_tokens):
+        if "## Files to Analyze:" in prompt:
+            return llm.packed_answer
+        llm.single_calls.append(prompt.split("File: ", 1)[1].split("\n", 1)[0])
+        return FINDING
+
+    monkeypatch.setattr(llm, "_generate", generate)
+    scanner = CodeScanner()
+    scanner.__dict__["llm"] = llm
+    return scanner
+
+
+async def analyze(scanner, paths):
+    group = [make_item(path, 10) for path in paths]
+    return await scanner._analyze_group(group, asyncio.Semaphore(4), "scan", False)
+
+
+async def test_only_files_missing_from_packed_answer_fall_back(scanner):
+    """Test that files absent from or invalid in the packed answer are analyzed alone."""
+    scanner.llm.packed_answer = {"a.py": FINDING, "b.py": "not an analysis"}
+
+    results = await analyze(scanner, ["a.py", "b.py", "c.py"])
+
+    assert sorted(scanner.llm.single_calls) == ["b.py", "c.py"]
+    assert len(results) == 3
+    assert all(issues is not None and len(issues) == 1 for issues in results)
+
+
+async def test_failed_packed_call_falls_back_for_every_file(scanner):
+    """Test that every file is analyzed alone when the packed request fails."""
+    scanner.llm.packed_answer = None
+
+    results = await analyze(scanner, ["a.py", "b.py"])
+
+    assert sorted(scanner.llm.single_calls) == ["a.py", "b.py"]
+    assert all(issues is not None for issues in results)
+
+
+def make_chunk(path: str, start_line: int) -> dict:
+    """Build a retrieved context chunk."""
+    return {
+        "file_path": path,
+        "language": "python",
+        "start_line": start_line,
+        "end_line": start_line,
+        "content": f"{path}:{start_line}",
+    }
+
+
+def test_packed_prompt_keeps_context_of_every_file():
+    """Test that each packed file gets its own capped share of the context."""
+    files = [{"path": f"f{i}.py", "code": "pass"} for i in range(3)]
+    contexts = [
+        # A chunk of another packed file is skipped in favour of the next one
+        [make_chunk("f1.py", 1)] + [make_chunk(f"ctx{i}.py", line) for line in range(5)]
+        for i in range(3)
+    ]
+
+    prompt = LLMEngine()._build_packed_prompt(files, "python", contexts)
+
+    for i in range(3):
+        for line in range(5):
+            included = f"ctx{i}.py:{line}" in prompt
+            assert included == (line < PACKED_CONTEXT_CHUNKS_PER_FILE)
+    assert "f1.py:1" not in prompt
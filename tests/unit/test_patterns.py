@@ -0,0 +1,34 @@
+"""Unit tests for the risky pattern pre-filter."""
+
+import pytest
+
+from app.scanner.patterns import has_risky_patterns
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import os\nos.system(cmd)\n",
+        'cursor.execute(f"SELECT * FROM users WHERE id = {user_id}")\n',
+        'password = "hunter22"\n',
+        "digest = hashlib.md5(data).hexdigest()\n",
+        "requests.get(url, verify=False)\n",
+        "data = pickle.loads(payload)\n",
+        "element.innerHTML = userInput;\n",
+    ],
+)
+def test_risky_code_matches(code):
+    """Test that common vulnerability patterns are flagged."""
+    assert has_risky_patterns(code)
+
+
+def test_clean_code_does_not_match():
+    """Test that plain code is not flagged."""
+    code = '''
+"""Math helpers."""
+
+
+def add(a, b):
+    return a + b
+'''
+    assert not has_risky_patterns(code)
@@ -0,0 +1,82 @@
+"""Unit tests for Celery scan tasks."""
+
+from datetime import datetime
+
+import pytest
+
+from app import tasks
+from app.models.schemas import ScanResult, ScanStatus
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Engine:
+    async def dispose(self):
+        pass
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """Run tasks without a database, recording the LLM engine each scan used."""
+    used = []
+
+    async def scan(scan_id, **kwargs):
+        used.append(tasks.scanner.llm)
+        return ScanResult(
+            scan_id=scan_id,
+            status=ScanStatus.COMPLETED,
+            started_at=datetime.utcnow(),
+            total_files=0,
+            scanned_files=0,
+            issues=[],
+        )
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(tasks.scanner, "scan", scan)
+    monkeypatch.setattr(tasks.crud, "update_scan_status", noop)
+    monkeypatch.setattr(tasks.crud, "save_scan_result", noop)
+    monkeypatch.setattr(tasks, "AsyncSessionLocal", _Session)
+    monkeypatch.setattr(tasks, "engine", _Engine())
+    return used
+
+
+def test_consecutive_tasks_use_fresh_llm_clients(engines):
+    """Test that each task's event loop gets its own LLM clients."""
+    tasks.run_scan_task("scan-1", {"repository_path": "/tmp/repo"})
+    tasks.run_scan_task("scan-2", {"repository_path": "/tmp/repo"})
+
+    first, second = engines
+    assert first is not second
+    # Clients opened on the first task's (now closed) loop were shut down with it
+    assert first.ollama_client._client.is_closed
+    assert "llm" not in tasks.scanner.__dict__
+
+
+def test_failed_save_marks_scan_failed(engines, monkeypatch):
+    """Test that a task failing after the scan leaves its row marked failed."""
+    statuses = []
+
+    async def update_scan_status(session, scan_id, status, error=None):
+        statuses.append((status, error))
+
+    async def save_scan_result(session, result):
+        raise RuntimeError("duplicate key")
+
+    monkeypatch.setattr(tasks.crud, "update_scan_status", update_scan_status)
+    monkeypatch.setattr(tasks.crud, "save_scan_result", save_scan_result)
+
+    with pytest.raises(RuntimeError):
+        tasks.run_scan_task("scan-1", {"repository_path": "/tmp/repo"})
+
+    assert statuses == [
+        (ScanStatus.IN_PROGRESS, None),
+        (ScanStatus.FAILED, "duplicate key"),
+    ]
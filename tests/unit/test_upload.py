@@ -0,0 +1,50 @@
+"""Unit tests for the archive upload endpoint."""
+
+import os
+import zipfile
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api import routes
+from app.api.dependencies import get_db
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Extract uploads under a temporary directory."""
+    monkeypatch.setattr(routes.settings, "upload_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ValueError("Archive too large"),
+        zipfile.BadZipFile("Bad CRC-32"),
+        NotImplementedError("That compression method is not supported"),
+        RuntimeError("File is encrypted, password required for extraction"),
+        OSError("No space left on device"),
+    ],
+)
+async def test_bad_archive_is_rejected_and_removed(upload_dir, monkeypatch, error):
+    """Test that an archive failing to extract gives 400 and leaves nothing behind."""
+
+    def extract_archive(archive, output_dir):
+        os.makedirs(output_dir)
+        open(os.path.join(output_dir, "partial.py"), "w").close()
+        raise error
+
+    monkeypatch.setattr(routes.ingestion, "extract_archive", extract_archive)
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_db] = lambda: None
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/scan/upload", files={"file": ("repo.zip", b"PK", "application/zip")}
+        )
+
+    assert response.status_code == 400
+    assert os.listdir(upload_dir) == []